@@ -28,78 +28,77 @@ def demo_continuous_mode():
     
     print(f"🎵 Using audio file: {audio_file}")
     
+    # Single diarization pass: continuous mode is a post-processing merge
+    # of the regular segments, so the models only need to run once
+    engine = NookEngine(
+        model_size="base.en",
+        continuous_mode=False,     # Regular mode
+        interruption_gap=1.0       # 1 second gap
+    )
+    
+    if not engine.initialize():
+        print("❌ Failed to initialize engine")
+        return
+    
+    regular_result = engine.diarize_audio(audio_file)
+    if not regular_result:
+        print("❌ Diarization failed")
+        engine.cleanup()
+        return
+    
+    continuous_result = {
+        **regular_result,
+        "segments": engine.merge_continuous(regular_result.get('segments', []), 1.0)
+    }
+    
+    engine.cleanup()
+    
     # Test 1: Regular mode
     print("\n" + "="*30)
     print("🔄 TEST 1: REGULAR MODE")
     print("="*30)
     
-    regular_engine = NookEngine(
-        model_size="base.en",
-        continuous_mode=False  # Regular mode
-    )
+    print(f"✅ Regular mode completed")
+    print(f"📊 Segments: {len(regular_result.get('segments', []))}")
+    print(f"👥 Speakers: {regular_result.get('speakers', [])}")
     
-    if regular_engine.initialize():
-        regular_result = regular_engine.diarize_audio(audio_file)
-        if regular_result:
-            print(f"✅ Regular mode completed")
-            print(f"📊 Segments: {len(regular_result.get('segments', []))}")
-            print(f"👥 Speakers: {regular_result.get('speakers', [])}")
-            
-            # Show segments
-            segments = regular_result.get('segments', [])
-            for i, seg in enumerate(segments):
-                print(f"  {i+1}. [{seg['speaker']}] {seg['text']}")
-        else:
-            print("❌ Regular mode failed")
-        
-        regular_engine.cleanup()
+    # Show segments
+    segments = regular_result.get('segments', [])
+    sys.stdout.write("".join(f"  {i+1}. [{seg['speaker']}] {seg['text']}\n" for i, seg in enumerate(segments)))
+    sys.stdout.flush()
     
     # Test 2: Continuous mode
     print("\n" + "="*30)
     print("🔄 TEST 2: CONTINUOUS MODE")
     print("="*30)
     
-    continuous_engine = NookEngine(
-        model_size="base.en",
-        continuous_mode=True,      # Continuous mode
-        interruption_gap=1.0       # 1 second gap
-    )
+    print(f"✅ Continuous mode completed")
+    print(f"📊 Segments: {len(continuous_result.get('segments', []))}")
+    print(f"👥 Speakers: {continuous_result.get('speakers', [])}")
     
-    if continuous_engine.initialize():
-        continuous_result = continuous_engine.diarize_audio(audio_file)
-        if continuous_result:
-            print(f"✅ Continuous mode completed")
-            print(f"📊 Segments: {len(continuous_result.get('segments', []))}")
-            print(f"👥 Speakers: {continuous_result.get('speakers', [])}")
-            
-            # Show segments
-            segments = continuous_result.get('segments', [])
-            for i, seg in enumerate(segments):
-                print(f"  {i+1}. [{seg['speaker']}] {seg['text']}")
-        else:
-            print("❌ Continuous mode failed")
-        
-        continuous_engine.cleanup()
+    # Show segments
+    segments = continuous_result.get('segments', [])
+    sys.stdout.write("".join(f"  {i+1}. [{seg['speaker']}] {seg['text']}\n" for i, seg in enumerate(segments)))
+    sys.stdout.flush()
     
     # Comparison
     print("\n" + "="*30)
     print("📊 COMPARISON")
     print("="*30)
     
-    if 'regular_result' in locals() and 'continuous_result' in locals():
-        regular_segments = len(regular_result.get('segments', []))
-        continuous_segments = len(continuous_result.get('segments', []))
-        
-        print(f"Regular mode segments: {regular_segments}")
-        print(f"Continuous mode segments: {continuous_segments}")
-        
-        if continuous_segments < regular_segments:
-            reduction = regular_segments - continuous_segments
-            print(f"✅ Reduction: {reduction} segments ({reduction/regular_segments*100:.1f}% fewer)")
-        elif continuous_segments == regular_segments:
-            print("ℹ️  Same number of segments (likely single speaker)")
-        else:
-            print("⚠️  Continuous mode has more segments (unusual)")
+    regular_segments = len(regular_result.get('segments', []))
+    continuous_segments = len(continuous_result.get('segments', []))
+    
+    print(f"Regular mode segments: {regular_segments}")
+    print(f"Continuous mode segments: {continuous_segments}")
+    
+    if continuous_segments < regular_segments:
+        reduction = regular_segments - continuous_segments
+        print(f"✅ Reduction: {reduction} segments ({reduction/regular_segments*100:.1f}% fewer)")
+    elif continuous_segments == regular_segments:
+        print("ℹ️  Same number of segments (likely single speaker)")
+    else:
+        print("⚠️  Continuous mode has more segments (unusual)")
     
     print("\n" + "="*30)
     print("💡 EXPLANATION")
@@ -13,17 +13,50 @@ sys.path.append(str(Path(__file__).parent / "nook_engine"))
 
 from nook_engine import NookEngine
 
+try:
+    import orjson  # Fast JSON serialization for streamed output
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _dumps(obj) -> bytes:
+    """Serialize one JSON record as compact UTF-8 bytes"""
+    if _HAS_ORJSON:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def save_jsonl(segments, output_file: str, metadata: dict) -> str:
+    """
+    Stream segments to JSONL (one segment per line) and write metadata
+    to a sibling .meta.json file. Readers should iterate the lines.
+    
+    Returns:
+        Path of the metadata file
+    """
+    with open(output_file, 'wb', buffering=1 << 20) as f:
+        for segment in segments:
+            f.write(_dumps(segment))
+            f.write(b"\n")
+    
+    meta_file = str(Path(output_file).with_suffix(".meta.json"))
+    with open(meta_file, 'wb') as f:
+        f.write(_dumps(metadata))
+    return meta_file
+
 def example_continuous_transcription():
     """Example of continuous transcription"""
     
     print("🎤 Nook Engine - Continuous Transcription Example")
     print("=" * 50)
     
-    # Initialize engine with continuous mode
+    # Initialize engine in regular mode: continuous merging is applied
+    # afterwards, so one diarization run yields both views
     engine = NookEngine(
         model_size="base.en",
-        continuous_mode=True,  # Enable continuous mode
-        interruption_gap=1.0   # 1 second gap to detect interruptions
+        continuous_mode=False,  # Merged below via merge_continuous()
+        interruption_gap=1.0    # 1 second gap to detect interruptions
     )
     
     # Initialize
@@ -33,7 +66,7 @@ def example_continuous_transcription():
         return
     
     print("✅ Engine initialized successfully")
-    print(f"🔄 Continuous mode: {'ON' if engine.continuous_mode else 'OFF'}")
+    print("🔄 Continuous mode: ON (post-processing)")
     print(f"⏱️  Interruption gap: {engine.interruption_gap}s")
     
     # Example audio file (replace with your file)
@@ -46,53 +79,49 @@ def example_continuous_transcription():
     
     print(f"\n🎵 Processing: {audio_file}")
     
-    # Perform diarization with continuous mode
+    # Perform diarization once, then merge into continuous transcription
     result = engine.diarize_audio(audio_file)
     
     if not result:
         print("❌ Failed to process audio")
+        engine.cleanup()
         return
     
+    regular_segments = result.get('segments', [])
+    segments = engine.merge_continuous(regular_segments, engine.interruption_gap)
+    total_duration = sum(seg['end'] - seg['start'] for seg in segments)
+    
     print("\n✅ Processing completed!")
-    print(f"📊 Total duration: {result.total_duration:.2f}s")
-    print(f"👥 Speakers detected: {result.metadata.get('speakers', [])}")
+    print(f"📊 Total duration: {total_duration:.2f}s")
+    print(f"👥 Speakers detected: {result.get('speakers', [])}")
     
     # Display results
     print("\n📝 Continuous Transcription:")
     print("-" * 50)
     
-    for i, segment in enumerate(result.segments):
-        print(f"\n{i+1}. {segment['speaker']} ({segment['start']:.1f}s - {segment['end']:.1f}s):")
-        print(f"   {segment['text']}")
+    sys.stdout.write("".join(
+        f"\n{i+1}. {segment['speaker']} ({segment['start']:.1f}s - {segment['end']:.1f}s):\n   {segment['text']}\n"
+        for i, segment in enumerate(segments)
+    ))
+    sys.stdout.flush()
     
-    # Save result
-    output_file = "continuous_transcription.json"
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump({
-            'segments': result.segments,
-            'speakers': result.metadata.get('speakers', []),
-            'total_duration': result.total_duration,
-            'metadata': result.metadata
-        }, f, indent=2, ensure_ascii=False)
+    # Save result: one segment per line, metadata in a sibling file
+    output_file = "continuous_transcription.jsonl"
+    meta_file = save_jsonl(segments, output_file, {
+        'speakers': result.get('speakers', []),
+        'total_duration': total_duration,
+        'metadata': {**result.get('metadata', {}), 'continuous_mode': True}
+    })
     
-    print(f"\n💾 Result saved to: {output_file}")
+    print(f"\n💾 Result saved to: {output_file} (metadata: {meta_file})")
     
     # Show comparison with regular mode
     print("\n🔄 Comparison with regular mode:")
     print("-" * 30)
     
-    # Create engine with regular mode
-    regular_engine = NookEngine(
-        model_size="base.en",
-        continuous_mode=False  # Regular mode
-    )
-    
-    if regular_engine.initialize():
-        regular_result = regular_engine.diarize_audio(audio_file)
-        if regular_result:
-            print(f"Regular mode segments: {len(regular_result.segments)}")
-            print(f"Continuous mode segments: {len(result.segments)}")
-            print(f"Reduction: {len(regular_result.segments) - len(result.segments)} segments")
+    print(f"Regular mode segments: {len(regular_segments)}")
+    print(f"Continuous mode segments: {len(segments)}")
+    print(f"Reduction: {len(regular_segments) - len(segments)} segments")
     
     engine.cleanup()
 
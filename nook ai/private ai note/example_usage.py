@@ -13,7 +13,41 @@ sys.path.append(str(Path(__file__).parent))
 from nook_engine import NookEngine
 
 
-def main():
+def pick_compute_type() -> str:
+    """Pick Whisper compute type based on GPU tensor-core support
+    
+    - Turing/Ampere+ (compute capability >= 7.5): int8_float16
+    - Pascal/Volta (>= 6.0): float16
+    - Older GPUs or CPU: int8
+    """
+    try:
+        import torch
+        if not torch.cuda.is_available():
+            return "int8"
+        capability = torch.cuda.get_device_capability()
+    except Exception:
+        return "int8"
+    
+    if capability >= (7, 5):
+        return "int8_float16"
+    if capability >= (6, 0):
+        return "float16"
+    return "int8"
+
+
+def create_engine() -> NookEngine:
+    """Create the engine shared by all examples (models are loaded once)"""
+    compute_type = pick_compute_type()
+    return NookEngine(
+        model_size="base.en",  # Can be changed to "small.en", "medium.en" for better quality
+        device="cpu" if compute_type == "int8" else "gpu",  # GPU only when a fast compute type is available
+        compute_type=compute_type,  # Picked from GPU capabilities
+        language="en",          # English language
+        diarization_threshold=0.7  # Threshold for speaker separation
+    )
+
+
+def main(engine: NookEngine):
     """Main example function"""
     
     print("🎤 Nook Engine - Usage Example")
@@ -26,23 +60,6 @@ def main():
         print("Make sure the file is in the current directory")
         return
     
-    # Create engine instance
-    print("🚀 Initializing Nook Engine...")
-    engine = NookEngine(
-        model_size="base.en",  # Can be changed to "small.en", "medium.en" for better quality
-        device="auto",          # Auto-detect device
-        compute_type="auto",    # Auto-detect computation type
-        language="en",          # English language
-        diarization_threshold=0.7  # Threshold for speaker separation
-    )
-    
-    # Initialize engine
-    if not engine.initialize():
-        print("❌ Voice Engine initialization error")
-        return
-    
-    print("✅ Nook Engine successfully initialized")
-    
     # Show model information
     print("\n📊 Model information:")
     model_info = engine.get_model_info()
@@ -79,26 +96,20 @@ def main():
     print(f"👥 Speakers found: {len(diarization_result.get('speakers', []))}")
     print(f"📊 Total duration: {diarization_result.get('total_duration', 0):.2f} sec")
     
-    # Save diarization result
-    engine.save_result(diarization_result, "reference_user_dialogue.json", "json")
-    
     # Show first few segments
     print("\n📋 First 5 dialogue segments:")
     segments = diarization_result.get('segments', [])
-    for i, segment in enumerate(segments[:5]):
-        print(f"{i+1}. [{segment['speaker']}] ({segment['start']:.1f}s - {segment['end']:.1f}s): {segment['text']}")
+    sys.stdout.write("".join(
+        f"{i+1}. [{segment['speaker']}] ({segment['start']:.1f}s - {segment['end']:.1f}s): {segment['text']}\n"
+        for i, segment in enumerate(segments[:5])
+    ))
+    sys.stdout.flush()
     
     # Save in various formats
     print("\n💾 Saving results...")
     
-    # JSON format (complete)
-    engine.save_result(diarization_result, "reference_user_dialogue.json", "json")
-    
-    # TXT format (readable)
-    engine.save_result(diarization_result, "reference_user_dialogue.json", "txt")
-    
-    # SRT format (subtitles)
-    engine.save_result(diarization_result, "reference_user_dialogue.json", "srt")
+    # JSON (complete), TXT (readable) and SRT (subtitles) in one pass
+    engine.save_result_multi(diarization_result, "reference_user_dialogue.json", ("json", "txt", "srt"))
     
     print("✅ All results saved")
     
@@ -110,10 +121,6 @@ def main():
     print(f"  Speakers: {', '.join(diarization_result.get('speakers', []))}")
     print(f"  Diarization method: {diarization_result.get('metadata', {}).get('method', 'unknown')}")
     
-    # Clean up resources
-    print("\n🧹 Cleaning up resources...")
-    engine.cleanup()
-    
     print("\n🎉 Processing completed successfully!")
     print("📁 Results saved to:")
     print("  - reference_user_transcription.json (transcription)")
@@ -122,38 +129,37 @@ def main():
     print("  - reference_user_dialogue.srt (subtitles)")
 
 
-def process_realtime_example():
+def process_realtime_example(engine: NookEngine):
     """Real-time processing example"""
     
     print("\n🎙️  Real-time processing example")
     print("=" * 50)
     
-    # Create engine
-    engine = NookEngine(
-        model_size="base.en",
-        device="auto",
-        language="en"
-    )
-    
-    if not engine.initialize():
-        print("❌ Initialization error")
-        return
-    
     print("✅ Engine initialized")
     print("🎤 To start real-time processing use:")
     print("   engine.process_realtime()")
     print("⏹️  Press Ctrl+C to stop")
-    
-    # Cleanup
-    engine.cleanup()
 
 
 if __name__ == "__main__":
+    # Create engine instance
+    print("🚀 Initializing Nook Engine...")
+    engine = create_engine()
+    
     try:
-        main()
+        # Initialize engine (models are loaded once and shared by both examples)
+        if not engine.initialize():
+            print("❌ Voice Engine initialization error")
+            sys.exit(1)
+        
+        print("✅ Nook Engine successfully initialized")
+        
+        # Both examples share the engine loaded above, so there is no second
+        # model load left to overlap; they run in order to keep output readable
+        main(engine)
         
         # Show real-time example
-        process_realtime_example()
+        process_realtime_example(engine)
         
     except KeyboardInterrupt:
         print("\n⏹️  Processing stopped by user")
@@ -161,3 +167,7 @@ if __name__ == "__main__":
         print(f"\n❌ Error: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        # Clean up resources
+        print("\n🧹 Cleaning up resources...")
+        engine.cleanup()
@@ -6,7 +6,9 @@ Demonstrates how to use Nook Engine from Swift applications
 import time
 import json
 import os
+import threading
 from pathlib import Path
+from typing import Dict, List, Optional
 
 # Add parent directory to path for imports
 import sys
@@ -14,6 +16,168 @@ sys.path.append(str(Path(__file__).parent.parent))
 
 from nook_engine import create_ios_engine, create_macos_engine
 
+try:
+    from watchdog.observers import Observer  # FSEvents/inotify file notifications
+    from watchdog.events import FileSystemEventHandler
+    _HAS_WATCHDOG = True
+except ImportError:
+    _HAS_WATCHDOG = False
+
+# Swift + PythonKit sample printed by swift_integration_guide()
+SWIFT_SNIPPET = (Path(__file__).parent / "snippets" / "nook_engine_manager.swift").read_text(encoding="utf-8")
+
+
+def atomic_write_json(path: str, obj: Dict):
+    """Write JSON via temp file + rename so the engine never reads a partial command"""
+    tmp = f"{path}.tmp.{os.getpid()}"
+    with open(tmp, 'w') as f:
+        json.dump(obj, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+
+class JsonlTail:
+    """Incrementally read complete JSON lines appended to a file"""
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._file = None
+        self._partial = ""
+    
+    def read(self) -> List[Dict]:
+        """Return records appended since the last call"""
+        if self._file is None:
+            try:
+                self._file = open(self.path, 'r')
+            except FileNotFoundError:
+                return []
+        
+        # File was rewritten from scratch; start over
+        if os.fstat(self._file.fileno()).st_size < self._file.tell():
+            self._file.seek(0)
+            self._partial = ""
+        
+        records = []
+        while True:
+            line = self._file.readline()
+            if not line:
+                break
+            if not line.endswith("\n"):
+                # Line still being written; keep it until the rest arrives
+                self._partial += line
+                break
+            line, self._partial = self._partial + line, ""
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        return records
+    
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+class EngineEventStream:
+    """
+    Subscribe to engine status/result events from status.jsonl
+    
+    The event log is opened once and tailed with readline(); command
+    results are matched by request_id. Waiting is deadline-bounded on a
+    threading.Event that watchdog (FSEvents on macOS, inotify on Linux)
+    sets when a watched file changes; without watchdog the wait re-checks
+    every 10ms.
+    """
+    
+    def __init__(self, command_file: str, events_file: str, stream_file: Optional[str] = None):
+        self.command_file = command_file
+        self.latest_status: Optional[Dict] = None
+        self._events = JsonlTail(events_file)
+        self._stream = JsonlTail(stream_file) if stream_file else None
+        self._request_counter = 0
+        self._changed = threading.Event()
+        self._observer = None
+        
+        if _HAS_WATCHDOG:
+            watched = {os.path.abspath(p) for p in (events_file, stream_file) if p}
+            changed = self._changed
+            
+            class _ChangeHandler(FileSystemEventHandler):
+                def on_any_event(self, event):
+                    paths = (getattr(event, "src_path", None), getattr(event, "dest_path", None))
+                    if watched.intersection(paths):
+                        changed.set()
+            
+            self._observer = Observer()
+            for directory in {os.path.dirname(p) for p in watched}:
+                self._observer.schedule(_ChangeHandler(), directory, recursive=False)
+            self._observer.start()
+    
+    def send_command(self, command: Dict, timeout: float = 5.0) -> Optional[Dict]:
+        """Write command and wait for the result carrying its request_id"""
+        self._request_counter += 1
+        request_id = f"{os.getpid()}-{self._request_counter}"
+        self._changed.clear()
+        atomic_write_json(self.command_file, {**command, "request_id": request_id})
+        
+        deadline = time.time() + timeout
+        while True:
+            for event in self._read_events():
+                if event.get("event") == "result" and event.get("request_id") == request_id:
+                    return event
+            if not self._wait(deadline):
+                return None
+    
+    def current_status(self, timeout: float = 5.0) -> Optional[Dict]:
+        """Latest status event (waits for the first one if none seen yet)"""
+        deadline = time.time() + timeout
+        while True:
+            self._read_events()
+            if self.latest_status is not None:
+                return self.latest_status
+            if not self._wait(deadline):
+                return None
+    
+    def wait_for_utterance_end(self, timeout: float) -> Optional[Dict]:
+        """Wait for the next final (is_final) update in the stream file"""
+        if self._stream is None:
+            return None
+        deadline = time.time() + timeout
+        while True:
+            for update in self._stream.read():
+                if update.get("is_final"):
+                    return update
+            if not self._wait(deadline):
+                return None
+    
+    def _read_events(self) -> List[Dict]:
+        """Read events appended since the last call"""
+        events = self._events.read()
+        for event in events:
+            if event.get("event") == "status":
+                self.latest_status = event
+        return events
+    
+    def _wait(self, deadline: float) -> bool:
+        """Wait for a watched file to change; False once the deadline passed"""
+        remaining = deadline - time.time()
+        if remaining <= 0:
+            return False
+        # Re-check periodically in case a notification was coalesced
+        self._changed.wait(min(remaining, 0.1 if self._observer is not None else 0.01))
+        self._changed.clear()
+        return True
+    
+    def close(self):
+        """Stop file notifications and close tailed files"""
+        if self._observer is not None:
+            self._observer.stop()
+            self._observer.join()
+            self._observer = None
+        self._events.close()
+        if self._stream is not None:
+            self._stream.close()
+
 
 def ios_integration_demo():
     """Demo of iOS integration capabilities"""
@@ -40,6 +204,7 @@ def ios_integration_demo():
     print(f"   Commands: {engine.command_file}")
     print(f"   Results: {engine.result_file}")
     print(f"   Stream: {engine.stream_file}")
+    print(f"   Events: {engine.events_file}")
     
     print("\n🔄 Engine is now monitoring for commands...")
     print("📱 iOS app can send commands via command.json file")
@@ -47,68 +212,53 @@ def ios_integration_demo():
     # Simulate iOS app commands
     print("\n🧪 Simulating iOS app commands...")
     
-    # Command 1: Get status
-    print("\n1️⃣ Getting status...")
-    command = {"type": "get_status"}
-    with open(engine.command_file, 'w') as f:
-        json.dump(command, f)
-    
-    time.sleep(0.5)  # Wait for processing
-    
-    if os.path.exists(engine.result_file):
-        with open(engine.result_file, 'r') as f:
-            result = json.load(f)
-        print(f"   Result: {result['message']}")
-    
-    # Command 2: Start listening
-    print("\n2️⃣ Starting listening...")
-    command = {
-        "type": "start_listening",
-        "output_file": "demo_transcription.json",
-        "enable_diarization": True,
-        "partial_updates": True,
-        "update_interval": 1.0
-    }
-    with open(engine.command_file, 'w') as f:
-        json.dump(command, f)
-    
-    time.sleep(1)  # Wait for processing
-    
-    if os.path.exists(engine.result_file):
-        with open(engine.result_file, 'r') as f:
-            result = json.load(f)
-        print(f"   Result: {result['message']}")
-    
-    if result.get('success'):
-        print("   🎤 Listening started! Speak into microphone...")
-        print("   📝 Real-time transcription will appear in stream file")
-        
-        # Let it run for a few seconds
-        time.sleep(5)
-        
-        # Command 3: Stop listening
-        print("\n3️⃣ Stopping listening...")
-        command = {"type": "stop_listening"}
-        with open(engine.command_file, 'w') as f:
-            json.dump(command, f)
-        
-        time.sleep(1)  # Wait for processing
+    events = EngineEventStream(engine.command_file, engine.events_file, engine.stream_file)
+    
+    try:
+        # Step 1: Status comes from the event subscription, no command needed
+        print("\n1️⃣ Getting status...")
+        status = events.current_status()
+        if status:
+            print(f"   Status: initialized={status['is_initialized']}, listening={status['is_listening']}")
         
-        if os.path.exists(engine.result_file):
-            with open(engine.result_file, 'r') as f:
-                result = json.load(f)
+        # Command 2: Start listening
+        print("\n2️⃣ Starting listening...")
+        command = {
+            "type": "start_listening",
+            "output_file": "demo_transcription.json",
+            "enable_diarization": True,
+            "partial_updates": True,
+            "update_interval": 1.0
+        }
+        result = events.send_command(command)
+        if result:
             print(f"   Result: {result['message']}")
+        
+        if result and result.get('success'):
+            print("   🎤 Listening started! Speak into microphone...")
+            print("   📝 Real-time transcription will appear in stream file")
             
-            if 'results' in result:
-                print(f"   📊 Final results: {len(result['results'].get('segments', []))} segments")
-    
-    # Command 4: Cleanup
-    print("\n4️⃣ Cleaning up...")
-    command = {"type": "cleanup"}
-    with open(engine.command_file, 'w') as f:
-        json.dump(command, f)
-    
-    time.sleep(1)  # Wait for processing
+            # Run until the first phrase is finalized (at most 10 seconds)
+            utterance = events.wait_for_utterance_end(timeout=10.0)
+            if utterance:
+                print(f"   🗣️  [{utterance.get('speaker', 'UNKNOWN')}] {utterance.get('text', '')}")
+            else:
+                print("   ⏱️  No finished phrase within 10 seconds")
+            
+            # Command 3: Stop listening
+            print("\n3️⃣ Stopping listening...")
+            result = events.send_command({"type": "stop_listening"})
+            if result:
+                print(f"   Result: {result['message']}")
+                
+                if 'results' in result:
+                    print(f"   📊 Final results: {len(result['results'].get('segments', []))} segments")
+        
+        # Command 4: Cleanup
+        print("\n4️⃣ Cleaning up...")
+        events.send_command({"type": "cleanup"})
+    finally:
+        events.close()
     
     print("✅ Demo completed!")
     print("\n💡 This demonstrates how iOS app can:")
@@ -142,44 +292,41 @@ def macos_integration_demo():
     # Simulate file transcription
     print("\n🧪 Simulating file transcription...")
     
-    # Check if we have a test audio file
-    test_audio = "test_audio.wav"
-    if os.path.exists(test_audio):
-        print(f"🎵 Transcribing: {test_audio}")
-        
-        command = {
-            "type": "transcribe_file",
-            "audio_file": test_audio,
-            "enable_diarization": True,
-            "output_format": "json"
-        }
-        
-        with open(engine.command_file, 'w') as f:
-            json.dump(command, f)
-        
-        time.sleep(2)  # Wait for processing
-        
-        if os.path.exists(engine.result_file):
-            with open(engine.result_file, 'r') as f:
-                result = json.load(f)
-            print(f"   Result: {result['message']}")
+    events = EngineEventStream(engine.command_file, engine.events_file)
+    
+    try:
+        # Check if we have a test audio file
+        test_audio = "test_audio.wav"
+        if os.path.exists(test_audio):
+            print(f"🎵 Transcribing: {test_audio}")
             
-            if result.get('success') and 'result' in result:
-                transcript = result['result']
-                print(f"   📝 Transcription completed!")
-                print(f"   🎯 Segments: {len(transcript.get('segments', []))}")
-                print(f"   👥 Speakers: {len(transcript.get('speakers', []))}")
-    else:
-        print(f"⚠️  Test audio file not found: {test_audio}")
-        print("   Create a test_audio.wav file to test transcription")
-    
-    # Cleanup
-    print("\n🧹 Cleaning up...")
-    command = {"type": "cleanup"}
-    with open(engine.command_file, 'w') as f:
-        json.dump(command, f)
-    
-    time.sleep(1)
+            command = {
+                "type": "transcribe_file",
+                "audio_file": test_audio,
+                "enable_diarization": True,
+                "output_format": "json"
+            }
+            
+            # Transcription can take a while on longer files
+            result = events.send_command(command, timeout=120.0)
+            if result:
+                print(f"   Result: {result['message']}")
+                
+                if result.get('success') and 'result' in result:
+                    transcript = result['result']
+                    print(f"   📝 Transcription completed!")
+                    print(f"   🎯 Segments: {len(transcript.get('segments', []))}")
+                    print(f"   👥 Speakers: {len(transcript.get('speakers', []))}")
+        else:
+            print(f"⚠️  Test audio file not found: {test_audio}")
+            print("   Create a test_audio.wav file to test transcription")
+        
+        # Cleanup
+        print("\n🧹 Cleaning up...")
+        events.send_command({"type": "cleanup"})
+    finally:
+        events.close()
+    
     print("✅ macOS demo completed!")
 
 
@@ -188,118 +335,8 @@ def swift_integration_guide():
     print("\n📱 Swift Integration Guide")
     print("=" * 50)
     
-    swift_code = '''
-// Swift + PythonKit integration example
-
-import Foundation
-import PythonKit
-
-class NookEngineManager: ObservableObject {
-    @Published var isListening = false
-    @Published var transcription = ""
-    @Published var speakers: [String] = []
-    
-    private let engine: PythonObject
-    private let tempDir = "/tmp/nook_engine"
-    private var statusTimer: Timer?
-    
-    init() {
-        // Initialize Python
-        Python.initialize()
-        
-        // Import Nook Engine
-        let nookEngine = Python.import("nook_engine")
-        self.engine = nookEngine.create_ios_engine(
-            model_size: "tiny.en",
-            optimize_for_mobile: true,
-            temp_dir: tempDir
-        )
-        
-        // Initialize engine
-        if engine.initialize() == true {
-            print("✅ Nook Engine initialized")
-            startStatusMonitoring()
-        } else {
-            print("❌ Failed to initialize Nook Engine")
-        }
-    }
-    
-    func startListening() {
-        // Send command via JSON file
-        let command = [
-            "type": "start_listening",
-            "enable_diarization": true
-        ]
-        
-        sendCommand(command)
-    }
-    
-    func stopListening() {
-        let command = ["type": "stop_listening"]
-        sendCommand(command)
-    }
-    
-    private func sendCommand(_ command: [String: Any]) {
-        let commandFile = "\(tempDir)/command.json"
-        
-        do {
-            let data = try JSONSerialization.data(withJSONObject: command)
-            try data.write(to: URL(fileURLWithPath: commandFile))
-        } catch {
-            print("Error sending command: \(error)")
-        }
-    }
-    
-    private func startStatusMonitoring() {
-        statusTimer = Timer.scheduledTimer(withTimeInterval: 0.5, repeats: true) { _ in
-            self.checkStatus()
-            self.checkStream()
-        }
-    }
-    
-    private func checkStatus() {
-        let statusFile = "\(tempDir)/status.json"
-        guard let data = try? Data(contentsOf: URL(fileURLWithPath: statusFile)) else { return }
-        
-        do {
-            let status = try JSONSerialization.jsonObject(with: data) as? [String: Any]
-            DispatchQueue.main.async {
-                self.isListening = status?["is_listening"] as? Bool ?? false
-            }
-        } catch {
-            print("Error reading status: \(error)")
-        }
-    }
-    
-    private func checkStream() {
-        let streamFile = "\(tempDir)/stream.jsonl"
-        guard let data = try? Data(contentsOf: URL(fileURLWithPath: streamFile)) else { return }
-        
-        guard let content = String(data: data, encoding: .utf8) else { return }
-        let lines = content.components(separatedBy: .newlines).filter { !$0.isEmpty }
-        
-        if let lastLine = lines.last {
-            do {
-                let update = try JSONSerialization.jsonObject(with: Data(lastLine.utf8)) as? [String: Any]
-                DispatchQueue.main.async {
-                    self.transcription = update?["text"] as? String ?? ""
-                }
-            } catch {
-                print("Error parsing stream: \(error)")
-            }
-        }
-    }
-    
-    deinit {
-        statusTimer?.invalidate()
-        let command = ["type": "cleanup"]
-        sendCommand(command)
-    }
-}
-'''
-    
     print("📝 Copy this Swift code to integrate Nook Engine:")
-    print(swift_code)
+    print(SWIFT_SNIPPET)
     
     print("\n🔧 Key integration points:")
     print("   1. Use PythonKit to import nook_engine")
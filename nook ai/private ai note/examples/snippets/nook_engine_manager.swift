@@ -0,0 +1,107 @@
+// Swift + PythonKit integration example
+
+import Foundation
+import PythonKit
+
+class NookEngineManager: ObservableObject {
+    @Published var isListening = false
+    @Published var transcription = ""
+    @Published var speakers: [String] = []
+    
+    private let engine: PythonObject
+    private let tempDir = "/tmp/nook_engine"
+    private var statusTimer: Timer?
+    
+    init() {
+        // Initialize Python
+        Python.initialize()
+        
+        // Import Nook Engine
+        let nookEngine = Python.import("nook_engine")
+        self.engine = nookEngine.create_ios_engine(
+            model_size: "tiny.en",
+            optimize_for_mobile: true,
+            temp_dir: tempDir
+        )
+        
+        // Initialize engine
+        if engine.initialize() == true {
+            print("✅ Nook Engine initialized")
+            startStatusMonitoring()
+        } else {
+            print("❌ Failed to initialize Nook Engine")
+        }
+    }
+    
+    func startListening() {
+        // Send command via JSON file
+        let command = [
+            "type": "start_listening",
+            "enable_diarization": true
+        ]
+        
+        sendCommand(command)
+    }
+    
+    func stopListening() {
+        let command = ["type": "stop_listening"]
+        sendCommand(command)
+    }
+    
+    private func sendCommand(_ command: [String: Any]) {
+        let commandFile = "\(tempDir)/command.json"
+        
+        do {
+            let data = try JSONSerialization.data(withJSONObject: command)
+            try data.write(to: URL(fileURLWithPath: commandFile))
+        } catch {
+            print("Error sending command: \(error)")
+        }
+    }
+    
+    private func startStatusMonitoring() {
+        statusTimer = Timer.scheduledTimer(withTimeInterval: 0.5, repeats: true) { _ in
+            self.checkStatus()
+            self.checkStream()
+        }
+    }
+    
+    private func checkStatus() {
+        let statusFile = "\(tempDir)/status.json"
+        guard let data = try? Data(contentsOf: URL(fileURLWithPath: statusFile)) else { return }
+        
+        do {
+            let status = try JSONSerialization.jsonObject(with: data) as? [String: Any]
+            DispatchQueue.main.async {
+                self.isListening = status?["is_listening"] as? Bool ?? false
+            }
+        } catch {
+            print("Error reading status: \(error)")
+        }
+    }
+    
+    private func checkStream() {
+        let streamFile = "\(tempDir)/stream.jsonl"
+        guard let data = try? Data(contentsOf: URL(fileURLWithPath: streamFile)) else { return }
+        
+        guard let content = String(data: data, encoding: .utf8) else { return }
+        let lines = content.components(separatedBy: .newlines).filter { !$0.isEmpty }
+        
+        if let lastLine = lines.last {
+            do {
+                let update = try JSONSerialization.jsonObject(with: Data(lastLine.utf8)) as? [String: Any]
+                DispatchQueue.main.async {
+                    self.transcription = update?["text"] as? String ?? ""
+                }
+            } catch {
+                print("Error parsing stream: \(error)")
+            }
+        }
+    }
+    
+    deinit {
+        statusTimer?.invalidate()
+        let command = ["type": "cleanup"]
+        sendCommand(command)
+    }
+}
@@ -7,8 +7,31 @@ import asyncio
 import json
 import websockets
 import time
+from collections import deque
 from typing import Dict, Optional
 
+try:
+    import uvloop  # libuv-based event loop (not available on Windows)
+    uvloop.install()
+except ImportError:
+    pass
+
+try:
+    import orjson  # Faster JSON framing for streaming updates
+    _HAS_ORJSON = True
+except ImportError:
+    _HAS_ORJSON = False
+
+
+def _loads(message):
+    """Parse a JSON frame (str or bytes)"""
+    return orjson.loads(message) if _HAS_ORJSON else json.loads(message)
+
+
+def _dumps(obj):
+    """Serialize a JSON frame (bytes with orjson, str otherwise)"""
+    return orjson.dumps(obj) if _HAS_ORJSON else json.dumps(obj)
+
 
 class NookEngineWebSocketClient:
     """WebSocket client for testing Nook Engine real-time API"""
@@ -18,15 +41,38 @@ class NookEngineWebSocketClient:
         self.websocket = None
         self.is_connected = False
         
+        # Received frames waiting for dispatch (created on connect)
+        self._message_queue: Optional[asyncio.Queue] = None
+        
         # State
         self.is_listening = False
-        self.transcription_history = []
+        self.transcription_history = deque(maxlen=4096)  # Recent updates only
         self.speakers = []
+        self._speakers_set = set()  # O(1) membership for self.speakers
+        
+        # Session totals, updated per update so summaries don't rescan history
+        self._total_segments = 0
+        self._total_words = 0
+        self._history_speakers = set()
+        self._first_timestamp = None
         
         # Callbacks
         self.on_transcription_update = None
         self.on_speaker_change = None
         self.on_error = None
+        
+        # Message type -> handler, built once instead of an elif chain per message
+        self._handlers = {
+            "welcome": self._on_welcome,
+            "listening_started": self._on_listening_started,
+            "listening_stopped": self._on_listening_stopped,
+            "transcription_update": self._on_transcription_update,
+            "speaker_change": self._on_speaker_change,
+            "transcription_progress": self._on_transcription_progress,
+            "transcription_complete": self._on_transcription_complete,
+            "error": self._on_error,
+            "pong": self._on_pong,
+        }
     
     async def connect(self):
         """Connect to WebSocket server"""
@@ -36,7 +82,10 @@ class NookEngineWebSocketClient:
             self.is_connected = True
             print("✅ Connected to Nook Engine WebSocket API")
             
-            # Start listening for messages
+            # Start listening for messages; dispatch runs in a separate task
+            # so socket reads are not gated by message handling
+            self._message_queue = asyncio.Queue(maxsize=256)
+            asyncio.create_task(self._consume_messages())
             asyncio.create_task(self._listen_for_messages())
             
             return True
@@ -53,96 +102,39 @@ class NookEngineWebSocketClient:
             print("🔌 Disconnected from WebSocket API")
     
     async def _listen_for_messages(self):
-        """Listen for incoming messages from server"""
+        """Listen for incoming messages from server and queue them for dispatch"""
         try:
             async for message in self.websocket:
-                await self._handle_message(message)
+                await self._message_queue.put(message)
         except websockets.exceptions.ConnectionClosed:
             print("🔌 WebSocket connection closed")
             self.is_connected = False
         except Exception as e:
             print(f"❌ Message listening error: {e}")
+        finally:
+            # Tell the consumer to stop once queued messages are handled
+            await self._message_queue.put(None)
+    
+    async def _consume_messages(self):
+        """Dispatch queued messages in arrival order"""
+        while True:
+            message = await self._message_queue.get()
+            try:
+                if message is None:
+                    break
+                await self._handle_message(message)
+            finally:
+                self._message_queue.task_done()
     
     async def _handle_message(self, message: str):
         """Handle incoming message from server"""
         try:
-            data = json.loads(message)
+            data = _loads(message)
             msg_type = data.get("type")
             
-            if msg_type == "welcome":
-                print(f"👋 {data.get('message', 'Welcome')}")
-                print(f"   Client ID: {data.get('client_id')}")
-                
-            elif msg_type == "listening_started":
-                print(f"🎤 {data.get('message', 'Listening started')}")
-                self.is_listening = True
-                
-            elif msg_type == "listening_stopped":
-                print(f"🛑 {data.get('message', 'Listening stopped')}")
-                self.is_listening = False
-                
-                # Show final results
-                if 'results' in data:
-                    results = data['results']
-                    print(f"📊 Final results:")
-                    print(f"   Segments: {len(results.get('segments', []))}")
-                    print(f"   Speakers: {len(results.get('speakers', []))}")
-                    print(f"   Duration: {results.get('total_duration', 0):.1f}s")
-                
-            elif msg_type == "transcription_update":
-                update = data.get("update", {})
-                text = update.get("text", "")
-                speaker = update.get("speaker", "Unknown")
-                timestamp = update.get("timestamp", 0)
-                
-                # Add to history
-                self.transcription_history.append({
-                    "text": text,
-                    "speaker": speaker,
-                    "timestamp": timestamp
-                })
-                
-                # Display update
-                print(f"📝 [{speaker}] {text}")
-                
-                # Trigger callback
-                if self.on_transcription_update:
-                    self.on_transcription_update(update)
-                
-            elif msg_type == "speaker_change":
-                speaker = data.get("speaker", "Unknown")
-                print(f"👥 Speaker changed to: {speaker}")
-                
-                if speaker not in self.speakers:
-                    self.speakers.append(speaker)
-                
-                # Trigger callback
-                if self.on_speaker_change:
-                    self.on_speaker_change(speaker)
-                
-            elif msg_type == "transcription_progress":
-                print(f"🔄 {data.get('message', 'Progress')}")
-                
-            elif msg_type == "transcription_complete":
-                print(f"✅ {data.get('message', 'Transcription complete')}")
-                if 'result' in data:
-                    result = data['result']
-                    print(f"   Audio file: {data.get('audio_file')}")
-                    print(f"   Segments: {len(result.get('segments', []))}")
-                    print(f"   Speakers: {len(result.get('speakers', []))}")
-                
-            elif msg_type == "error":
-                error_msg = data.get("message", "Unknown error")
-                print(f"❌ Error: {error_msg}")
-                
-                # Trigger callback
-                if self.on_error:
-                    self.on_error(error_msg)
-                
-            elif msg_type == "pong":
-                # Ping-pong for connection health
-                pass
-                
+            handler = self._handlers.get(msg_type)
+            if handler:
+                handler(data)
             else:
                 print(f"❓ Unknown message type: {msg_type}")
                 
@@ -151,6 +143,92 @@ class NookEngineWebSocketClient:
         except Exception as e:
             print(f"❌ Message handling error: {e}")
     
+    def _on_welcome(self, data: Dict):
+        print(f"👋 {data.get('message', 'Welcome')}")
+        print(f"   Client ID: {data.get('client_id')}")
+    
+    def _on_listening_started(self, data: Dict):
+        print(f"🎤 {data.get('message', 'Listening started')}")
+        self.is_listening = True
+    
+    def _on_listening_stopped(self, data: Dict):
+        print(f"🛑 {data.get('message', 'Listening stopped')}")
+        self.is_listening = False
+        
+        # Show final results
+        if 'results' in data:
+            results = data['results']
+            print(f"📊 Final results:")
+            print(f"   Segments: {len(results.get('segments', []))}")
+            print(f"   Speakers: {len(results.get('speakers', []))}")
+            print(f"   Duration: {results.get('total_duration', 0):.1f}s")
+    
+    def _on_transcription_update(self, data: Dict):
+        update = data.get("update", {})
+        text = update.get("text", "")
+        speaker = update.get("speaker", "Unknown")
+        timestamp = update.get("timestamp", 0)
+        
+        # Add to history
+        self._append_transcription({
+            "text": text,
+            "speaker": speaker,
+            "timestamp": timestamp
+        })
+        
+        # Display update
+        print(f"📝 [{speaker}] {text}")
+        
+        # Trigger callback
+        if self.on_transcription_update:
+            self.on_transcription_update(update)
+    
+    def _append_transcription(self, item: Dict):
+        """Record an update in history and in the running session totals"""
+        self.transcription_history.append(item)
+        self._total_segments += 1
+        text = item["text"]
+        if text:
+            self._total_words += text.count(" ") + 1
+        self._history_speakers.add(item["speaker"])
+        if self._first_timestamp is None:
+            self._first_timestamp = item["timestamp"]
+    
+    def _on_speaker_change(self, data: Dict):
+        speaker = data.get("speaker", "Unknown")
+        print(f"👥 Speaker changed to: {speaker}")
+        
+        if speaker not in self._speakers_set:
+            self._speakers_set.add(speaker)
+            self.speakers.append(speaker)
+        
+        # Trigger callback
+        if self.on_speaker_change:
+            self.on_speaker_change(speaker)
+    
+    def _on_transcription_progress(self, data: Dict):
+        print(f"🔄 {data.get('message', 'Progress')}")
+    
+    def _on_transcription_complete(self, data: Dict):
+        print(f"✅ {data.get('message', 'Transcription complete')}")
+        if 'result' in data:
+            result = data['result']
+            print(f"   Audio file: {data.get('audio_file')}")
+            print(f"   Segments: {len(result.get('segments', []))}")
+            print(f"   Speakers: {len(result.get('speakers', []))}")
+    
+    def _on_error(self, data: Dict):
+        error_msg = data.get("message", "Unknown error")
+        print(f"❌ Error: {error_msg}")
+        
+        # Trigger callback
+        if self.on_error:
+            self.on_error(error_msg)
+    
+    def _on_pong(self, data: Dict):
+        # Ping-pong for connection health
+        pass
+    
     async def send_command(self, command: Dict) -> bool:
         """Send command to server"""
         if not self.is_connected or not self.websocket:
@@ -158,7 +236,7 @@ class NookEngineWebSocketClient:
             return False
         
         try:
-            await self.websocket.send(json.dumps(command))
+            await self.websocket.send(_dumps(command))
             return True
         except Exception as e:
             print(f"❌ Failed to send command: {e}")
@@ -215,17 +293,14 @@ class NookEngineWebSocketClient:
     
     def get_transcription_summary(self) -> Dict:
         """Get summary of transcription session"""
-        if not self.transcription_history:
+        if not self._total_segments:
             return {"message": "No transcription data"}
         
-        total_words = sum(len(item["text"].split()) for item in self.transcription_history)
-        unique_speakers = list(set(item["speaker"] for item in self.transcription_history))
-        
         return {
-            "total_segments": len(self.transcription_history),
-            "total_words": total_words,
-            "speakers": unique_speakers,
-            "duration": time.time() - self.transcription_history[0]["timestamp"] if self.transcription_history else 0
+            "total_segments": self._total_segments,
+            "total_words": self._total_words,
+            "speakers": list(self._history_speakers),
+            "duration": time.time() - self._first_timestamp
         }
 
 
@@ -8,16 +8,18 @@ Added low-latency mode with VAD and streaming output (JSONL):
 """
 
 import os
+import re
+import bisect
+import struct
 import time
 import threading
-import wave
 import numpy as np
 from pathlib import Path
 from typing import Dict, List, Optional, Union, Callable
 import logging
 import json
 import queue
-from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     import webrtcvad  # For VAD in low-latency mode
@@ -25,11 +27,355 @@ try:
 except Exception:
     _HAS_WEBRTCVAD = False
 
+try:
+    import orjson  # Fast JSON encoding for streamed segments
+    _HAS_ORJSON = True
+except Exception:
+    _HAS_ORJSON = False
+
+try:
+    import sounddevice as sd  # Default capture backend (PortAudio)
+    _HAS_SOUNDDEVICE = True
+except Exception:
+    sd = None
+    _HAS_SOUNDDEVICE = False
+
+try:
+    import pyaudio  # Alternative capture backend
+    _HAS_PYAUDIO = True
+except Exception:
+    pyaudio = None
+    _HAS_PYAUDIO = False
+
+try:
+    import numba  # Optional JIT for the low-latency VAD state machine
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _dumps(obj, indent: bool = False) -> bytes:
+    """Serialize to UTF-8 JSON bytes, using orjson when available"""
+    if _HAS_ORJSON:
+        # NON_STR_KEYS matches json.dumps, which stringifies int keys instead of failing
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+    return json.dumps(obj, indent=2 if indent else None, ensure_ascii=False).encode("utf-8")
+
+
+def _loads(data):
+    """Parse JSON from bytes or str, using orjson when available"""
+    if _HAS_ORJSON:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+# Input device classification for _init_sounddevice (matched against lowercased names)
+_SYSTEM_AUDIO_RE = re.compile(r"blackhole|loopback|system|audio|mix")
+_MICROPHONE_RE = re.compile(r"microphone|микрофон|built-in|macbook|internal")
+
+# Trivial fillers dropped from non-diarized streaming updates
+_FILLER_WORDS = frozenset({"ok", "okay", "yeah", "uh", "um"})
+
+# Low-latency segmenter: per-frame actions returned by the VAD state machine
+_ACT_START = 1    # speech started at this frame
+_ACT_APPEND = 2   # speech frame, segment now ends after it
+_ACT_PARTIAL = 4  # publish partial segment (is_final=false)
+_ACT_FINAL = 8    # publish final segment (is_final=true)
+
+# state: [in_speech, silence_counter, speech_len, last_emit_sample, span]
+# params: [min_speech_frames, post_silence_frames, max_segment_frames, partial_interval_samples, frame_samples]
+_VAD_FSM_SIGNATURE = "void(uint8[:], int64[:], int64[:], int64, uint8[:])"
+
+
+def _vad_fsm_py(flags, state, params, first_sample, actions):
+    """Run the speech/silence state machine over a batch of webrtcvad decisions.
+
+    Time is measured in captured samples (flags[i] covers the frame starting at
+    first_sample + i * frame_samples), so no clock is read on the audio thread.
+    """
+    min_speech, post_silence, max_segment, partial_samples = params[0], params[1], params[2], params[3]
+    frame_samples = params[4]
+    for i in range(flags.shape[0]):
+        act = 0
+        if flags[i]:
+            sample = first_sample + i * frame_samples
+            if state[0] == 0:
+                state[0] = 1
+                state[1] = 0
+                state[2] = 0
+                state[3] = sample
+                state[4] = 0
+                act |= _ACT_START
+            act |= _ACT_APPEND
+            state[1] = 0
+            state[2] += 1
+            state[4] += 1
+            # Partial emit
+            if sample - state[3] >= partial_samples:
+                act |= _ACT_PARTIAL
+                state[3] = sample
+            # Limit maximum segment length
+            if state[4] >= max_segment:
+                act |= _ACT_FINAL
+                state[0] = 0
+        elif state[0] != 0:
+            state[1] += 1
+            state[4] += 1
+            if state[2] >= min_speech and (state[1] >= post_silence or state[4] >= max_segment):
+                act |= _ACT_FINAL
+                state[0] = 0
+            elif state[4] >= max_segment:
+                # Too little speech before the segment hit its length cap: drop it
+                state[0] = 0
+        actions[i] = act
+
+
+_vad_fsm = None
+
+
+def _get_vad_fsm():
+    """Return the VAD state machine, JIT-compiled with an explicit signature when numba is available."""
+    global _vad_fsm
+    if _vad_fsm is None:
+        if _HAS_NUMBA:
+            try:
+                _vad_fsm = numba.njit(_VAD_FSM_SIGNATURE, cache=True, nogil=True)(_vad_fsm_py)
+            except Exception as e:
+                logger.warning(f"numba compilation failed, using Python VAD state machine: {e}")
+                _vad_fsm = _vad_fsm_py
+        else:
+            _vad_fsm = _vad_fsm_py
+    return _vad_fsm
+
+
+def _f32_to_i16_clip_py(src, dst):
+    """Clamp float32 samples to [-1, 1] and scale into int16 in a single pass (NaN -> 0)."""
+    for i in range(src.shape[0]):
+        v = src[i]
+        if v != v:
+            dst[i] = 0
+        elif v >= 1.0:
+            dst[i] = 32767
+        elif v <= -1.0:
+            dst[i] = -32767
+        else:
+            dst[i] = np.int16(v * 32767.0)
+
+
+_pcm_kernel = None
+_pcm_kernel_ready = False
+
+
+def _get_pcm_kernel():
+    """Return the fused float32 -> int16 kernel, or None when numba is unavailable."""
+    global _pcm_kernel, _pcm_kernel_ready
+    if not _pcm_kernel_ready:
+        _pcm_kernel_ready = True
+        if _HAS_NUMBA:
+            try:
+                _pcm_kernel = numba.njit("void(float32[:], int16[:])", cache=True, nogil=True)(_f32_to_i16_clip_py)
+            except Exception as e:
+                logger.warning(f"numba compilation failed, using NumPy PCM conversion: {e}")
+    return _pcm_kernel
+
+
+class _CaptureRing:
+    """
+    Fixed-size int16 ring filled by a PortAudio callback and drained in whole chunks
+    """
+
+    def __init__(self, capacity: int, channels: int):
+        self._buf = np.zeros((capacity, channels), dtype=np.int16)
+        self._write = 0  # total frames written
+        self._read = 0  # total frames consumed
+        self._cond = threading.Condition()
+        self.closed = False
+
+    def write(self, frames: np.ndarray):
+        """Append frames (called from the audio callback); the oldest audio is dropped on overrun"""
+        capacity = self._buf.shape[0]
+        n = frames.shape[0]
+        if n > capacity:
+            frames = frames[-capacity:]
+            n = capacity
+        with self._cond:
+            pos = self._write % capacity
+            first = min(n, capacity - pos)
+            self._buf[pos:pos + first] = frames[:first]
+            if first < n:
+                self._buf[:n - first] = frames[first:]
+            self._write += n
+            if self._write - self._read > capacity:
+                self._read = self._write - capacity
+            self._cond.notify_all()
+
+    def read_into(self, out: np.ndarray, timeout: float) -> bool:
+        """Block until len(out) frames are buffered, then copy them into out"""
+        capacity = self._buf.shape[0]
+        n = out.shape[0]
+        with self._cond:
+            if not self._cond.wait_for(lambda: self.closed or self._write - self._read >= n, timeout):
+                return False
+            if self._write - self._read < n:
+                return False
+            pos = self._read % capacity
+            first = min(n, capacity - pos)
+            out[:first] = self._buf[pos:pos + first]
+            if first < n:
+                out[first:] = self._buf[:n - first]
+            self._read += n
+            return True
+
+    def close(self):
+        """Wake any blocked reader"""
+        with self._cond:
+            self.closed = True
+            self._cond.notify_all()
+
+
+class _AsyncWriter:
+    """
+    Daemon thread that owns the session's output files; callers hand it
+    already-serialized bytes so disk latency stays off the processing threads
+    """
+
+    def __init__(self, name: str = "nook-writer"):
+        self._q: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._files: Dict[str, object] = {}
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def append(self, path: str, data: bytes):
+        """Append data to path (kept open for the session)"""
+        self._q.put(("append", path, data))
+
+    def replace(self, path: str, data: bytes):
+        """Atomically replace path with data"""
+        self._q.put(("replace", path, data))
+
+    def truncate(self, path: str):
+        """Empty an append file; ordered after everything queued before it"""
+        self._q.put(("truncate", path, None))
+
+    def close(self, timeout: Optional[float] = None):
+        """Write everything queued so far, close the files and stop the thread"""
+        self._q.put(None)
+        if self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _file(self, path: str):
+        fh = self._files.get(path)
+        if fh is None:
+            fh = open(path, "ab", buffering=64 * 1024)
+            self._files[path] = fh
+        return fh
+
+    def _run(self):
+        stop = False
+        while not stop:
+            # Take everything pending so appends share one flush and only the
+            # newest snapshot of each file is written
+            batch = [self._q.get()]
+            while True:
+                try:
+                    batch.append(self._q.get_nowait())
+                except queue.Empty:
+                    break
+            newest = {item[1]: i for i, item in enumerate(batch) if item is not None and item[0] == "replace"}
+            dirty = set()
+            for i, item in enumerate(batch):
+                if item is None:
+                    stop = True
+                    continue
+                op, path, data = item
+                try:
+                    if op == "append":
+                        fh = self._file(path)
+                        fh.write(data)
+                        dirty.add(path)
+                    elif op == "truncate":
+                        fh = self._file(path)
+                        fh.flush()
+                        fh.truncate(0)
+                        dirty.discard(path)
+                    elif newest[path] == i:
+                        tmp_path = f"{path}.tmp"
+                        with open(tmp_path, "wb") as f:
+                            f.write(data)
+                        os.replace(tmp_path, path)
+                except Exception as e:
+                    logger.error(f"Error writing {path}: {e}")
+            for path in dirty:
+                try:
+                    self._files[path].flush()
+                except Exception as e:
+                    logger.error(f"Error writing {path}: {e}")
+        for fh in self._files.values():
+            try:
+                fh.close()
+            except Exception:
+                pass
+        self._files.clear()
+
+
+def _wav_header(channels: int, sample_rate: int, data_bytes: int) -> bytes:
+    """44-byte RIFF/WAVE header for 16-bit PCM"""
+    block_align = channels * 2
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 36 + data_bytes, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * block_align, block_align, 16,
+        b"data", data_bytes,
+    )
+
+
+def _write_wav(path: str, pcm: np.ndarray, channels: int, sample_rate: int):
+    """Write C-contiguous int16 frames as a WAV: one header write plus the array's own buffer"""
+    with open(path, "wb", buffering=0) as f:
+        f.write(_wav_header(channels, sample_rate, pcm.nbytes))
+        f.write(memoryview(pcm).cast("B"))
+
+
+class _SessionWav:
+    """
+    One 16-bit PCM WAV for a whole recording session: frames are appended with
+    os.write and the RIFF/data sizes are patched in when it is closed
+    """
+
+    def __init__(self, path: str, channels: int, sample_rate: int):
+        self.path = path
+        self._data_bytes = 0
+        self._fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        os.write(self._fd, _wav_header(channels, sample_rate, 0))
+
+    def write(self, pcm: bytes):
+        """Append raw int16 frames"""
+        view = memoryview(pcm)
+        while view:
+            n = os.write(self._fd, view)
+            view = view[n:]
+        self._data_bytes += len(pcm)
+
+    def close(self):
+        """Patch the RIFF and data chunk sizes and close the file"""
+        if self._fd is None:
+            return
+        try:
+            os.pwrite(self._fd, struct.pack("<I", 36 + self._data_bytes), 4)
+            os.pwrite(self._fd, struct.pack("<I", self._data_bytes), 40)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+
 class AudioProcessor:
     """
     Audio processor for microphone operation and real-time processing
@@ -56,6 +402,10 @@ class AudioProcessor:
         self.chunk_duration = chunk_duration
         self.backend = backend
         
+        # sounddevice device list, reused for a few seconds (PortAudio rescans every host API)
+        self._devices_cache = None
+        self._devices_cache_ts = 0.0
+        
         # Auto-detect backend
         if backend == "auto":
             self.backend = self._detect_best_backend()
@@ -78,8 +428,30 @@ class AudioProcessor:
         self._stream: Optional[object] = None
         self._stream_thread: Optional[threading.Thread] = None
         self._stop_event = threading.Event()
-        self._frames_deque: deque[bytes] = deque(maxlen=int(sample_rate * 10 // 320))  # ~10s @ 20ms frames
-        self._segment_queue: "queue.Queue[dict]" = queue.Queue()
+        # Callback PCM path: ~10s int16 ring (cut into 20ms VAD frames) + float32 scratch for the NumPy fallback
+        self._frame_samples = int(sample_rate * 0.02)
+        self._ring = np.zeros((sample_rate * 10 // self._frame_samples) * self._frame_samples, dtype=np.int16)
+        self._ring_bytes = memoryview(self._ring).cast("B")  # zero-copy frames for webrtcvad
+        self._ring_write = 0  # total samples written
+        self._ring_read = 0  # total samples handed to VAD
+        self._f32_scratch = np.empty(self._frame_samples, dtype=np.float32)
+        self._vad_flags = np.zeros(4, dtype=np.uint8)
+        self._vad_actions = np.zeros(4, dtype=np.uint8)
+        self._segment_queue: "queue.Queue[Optional[dict]]" = queue.Queue()  # None stops the worker
+        self._writer: Optional[_AsyncWriter] = None  # low-latency output files, open for the session
+        self._segment_worker: Optional[threading.Thread] = None
+        self._vad_thread: Optional[threading.Thread] = None
+        # Aggregate left in memory by the last session: (path, (mtime_ns, size) after the final snapshot, agg)
+        self._agg_cache: Optional[tuple] = None
+
+        # Chunked recording: one input stream for the session feeding a capture ring
+        self._capture_stream: Optional[object] = None
+        self._capture_ring: Optional[_CaptureRing] = None
+        # Reused per-chunk buffers (grown if chunk_duration increases)
+        chunk_frames = int(sample_rate * chunk_duration)
+        self._rec_buf_i16 = np.empty((chunk_frames, channels), dtype=np.int16)
+        self._rec_buf_bytes = bytearray(chunk_frames * 2 * channels)
+        self._chunk_f32 = np.empty(chunk_frames, dtype=np.float32)
         self._sequence_id = 0
         
         logger.info(f"Initializing AudioProcessor: {self.backend}, SR: {sample_rate}")
@@ -102,23 +474,28 @@ class AudioProcessor:
         logger.warning("No audio backend found, using sounddevice")
         return "sounddevice"
     
+    def _query_devices(self, ttl: float = 5.0):
+        """sd.query_devices(), cached for ttl seconds"""
+        now = time.monotonic()
+        if self._devices_cache is None or now - self._devices_cache_ts >= ttl:
+            if not _HAS_SOUNDDEVICE:
+                raise ImportError("sounddevice not installed")
+            self._devices_cache = sd.query_devices()
+            self._devices_cache_ts = now
+        return self._devices_cache
+    
     def _check_sounddevice(self) -> bool:
         """Check sounddevice availability"""
         try:
-            import sounddevice as sd
             # Check available devices
-            devices = sd.query_devices()
+            devices = self._query_devices()
             return len(devices) > 0
         except ImportError:
             return False
     
     def _check_pyaudio(self) -> bool:
         """Check pyaudio availability"""
-        try:
-            import pyaudio
-            return True
-        except ImportError:
-            return False
+        return _HAS_PYAUDIO
     
     def _check_av(self) -> bool:
         """Check av availability"""
@@ -132,6 +509,10 @@ class AudioProcessor:
         """Initialize audio processor"""
         try:
             logger.info(f"Initializing backend: {self.backend}")
+
+            # Compile the JIT kernels now rather than on the first audio callback
+            _get_vad_fsm()
+            _get_pcm_kernel()
             
             if self.backend == "sounddevice":
                 return self._init_sounddevice()
@@ -149,11 +530,13 @@ class AudioProcessor:
     
     def _init_sounddevice(self) -> bool:
         """Initialize sounddevice with system audio support"""
+        if not _HAS_SOUNDDEVICE:
+            logger.error("sounddevice not installed")
+            return False
+        
         try:
-            import sounddevice as sd
-            
             # Check available devices
-            devices = sd.query_devices()
+            devices = self._query_devices()
             input_devices = [d for d in devices if d.get('max_input_channels', 0) > 0]
             
             if not input_devices:
@@ -169,12 +552,13 @@ class AudioProcessor:
             microphone_devices = []
             
             for idx, info in enumerate(devices):
-                if info.get('max_input_channels', 0) > 0:
-                    name = (info.get('name') or '').lower()
-                    if any(keyword in name for keyword in ['blackhole', 'loopback', 'system', 'audio', 'mix']):
-                        system_audio_devices.append((idx, info))
-                    elif any(keyword in name for keyword in ['microphone', 'микрофон', 'built-in', 'macbook', 'internal']):
-                        microphone_devices.append((idx, info))
+                if info.get('max_input_channels', 0) <= 0:
+                    continue
+                name = (info.get('name') or '').lower()
+                if _SYSTEM_AUDIO_RE.search(name):
+                    system_audio_devices.append((idx, info))
+                elif _MICROPHONE_RE.search(name):
+                    microphone_devices.append((idx, info))
             
             # Prefer microphone devices to capture user's voice by default
             if microphone_devices:
@@ -205,9 +589,11 @@ class AudioProcessor:
     
     def _init_pyaudio(self) -> bool:
         """Initialize pyaudio"""
+        if not _HAS_PYAUDIO:
+            logger.error("pyaudio not installed")
+            return False
+        
         try:
-            import pyaudio
-            
             # Initialize PyAudio
             self.audio_backend = pyaudio.PyAudio()
             
@@ -245,7 +631,8 @@ class AudioProcessor:
         voice_engine,
         output_file: str = "realtime_dialogue.json",
         chunk_duration: int = 10,
-        save_audio: bool = True
+        save_audio: bool = True,
+        flush_interval_s: float = 5.0
     ) -> bool:
         """
         Start real-time processing
@@ -254,7 +641,8 @@ class AudioProcessor:
             voice_engine: NookEngine instance
             output_file: File to save results
             chunk_duration: Chunk duration in seconds
-            save_audio: Whether to save audio chunks
+            save_audio: Whether to save the session audio (audio_chunks/session_<timestamp>.wav)
+            flush_interval_s: Minimum seconds between snapshots of output_file
             
         Returns:
             True if successfully started
@@ -285,7 +673,7 @@ class AudioProcessor:
             # Start recording thread
             recording_thread = threading.Thread(
                 target=self._recording_loop,
-                args=(voice_engine, output_file, save_audio)
+                args=(voice_engine, output_file, save_audio, flush_interval_s)
             )
             recording_thread.daemon = True
             recording_thread.start()
@@ -309,12 +697,23 @@ class AudioProcessor:
         post_silence_ms: int = 400,
         max_segment_ms: int = 8000,
         enable_diarization: bool = True,
+        save_audio: bool = False,
+        flush_interval_s: float = 5.0,
+        min_diarization_s: float = 0.8,
     ) -> bool:
         """
         Start low-latency mode with VAD and streaming JSONL output.
 
         - Every partial_interval seconds intermediate segments are published (is_final=false)
         - At the end of phrase final segment is published (is_final=true)
+        - Segments are transcribed from memory; final segments are written to
+          audio_chunks/ only when save_audio is set or diarization needs a file;
+          without save_audio the file names rotate over 256 slots
+        - The aggregated JSON is kept in memory; each final is appended to
+          <output_json>.delta.jsonl and the full file is rewritten every
+          flush_interval_s seconds and on stop_recording()
+        - Finals shorter than min_diarization_s skip the diarizer and take the
+          speaker who dominated recent finals
         """
         if not self.is_initialized:
             if not self.initialize():
@@ -327,71 +726,117 @@ class AudioProcessor:
                 output_file=output_json,
                 chunk_duration=2,
                 save_audio=False,
+                flush_interval_s=flush_interval_s,
             )
 
-        try:
-            import sounddevice as sd
+        if not _HAS_SOUNDDEVICE:
+            logger.error("sounddevice not installed, low-latency mode unavailable")
+            return False
 
+        try:
             os.makedirs(os.path.dirname(output_json) or ".", exist_ok=True)
+            os.makedirs(os.path.dirname(output_jsonl) or ".", exist_ok=True)
+            if save_audio or enable_diarization:
+                os.makedirs("audio_chunks", exist_ok=True)
 
             self._stop_event.clear()
-            self._frames_deque.clear()
+            self._ring_write = 0
+            self._ring_read = 0
             self._sequence_id = 0
+            # Fresh queue per session so a stale stop sentinel can't end the new worker
+            segment_queue: "queue.Queue[Optional[dict]]" = queue.Queue()
+            self._segment_queue = segment_queue
 
-            # Segmenter state
+            # Segmenter state: the current segment is ring[speech_start_sample:speech_end_sample]
+            # (absolute sample positions); counters live in fsm_state, see _vad_fsm_py
             state = {
-                "in_speech": False,
-                "speech_frames": [],  # list[bytes]
                 "speech_start_sample": 0,
-                "last_emit_time": 0.0,
-                "samples_seen": 0,
-                "frame_samples": int(self.sample_rate * 0.02),  # 20 ms
-                "frame_bytes": int(self.sample_rate * 0.02) * 2,  # int16 mono
-                "partial_interval": partial_interval,
-                "min_speech_frames": max(1, int(min_speech_ms / 20)),
-                "post_silence_frames": max(1, int(post_silence_ms / 20)),
-                "max_segment_frames": max(1, int(max_segment_ms / 20)),
-                "silence_counter": 0,
+                "speech_end_sample": 0,
+                "frame_samples": self._frame_samples,  # 20 ms
             }
+            max_segment_frames = max(1, int(max_segment_ms / 20))
+            vad_fsm = _get_vad_fsm()
+            pcm_kernel = _get_pcm_kernel()
+            fsm_state = np.zeros(5, dtype=np.int64)
+            fsm_params = np.array([
+                max(1, int(min_speech_ms / 20)),
+                max(1, int(post_silence_ms / 20)),
+                max_segment_frames,
+                int(partial_interval * self.sample_rate),
+                self._frame_samples,
+            ], dtype=np.int64)
+            partial_context_samples = int(0.6 * self.sample_rate)
+            # The callback fires every 20 ms; VAD wakes once per 3 frames (60 ms)
+            vad_batch_samples = 3 * self._frame_samples
+            vad_cond = threading.Condition()
+
+            # The ring must hold a whole segment until it is emitted
+            ring_frames = max_segment_frames + 64
+            if self._ring.shape[0] < ring_frames * self._frame_samples:
+                self._ring = np.zeros(ring_frames * self._frame_samples, dtype=np.int16)
+                self._ring_bytes = memoryview(self._ring).cast("B")
 
             vad = webrtcvad.Vad(vad_aggressiveness)
 
-            def _write_jsonl(path: str, obj: dict):
-                with open(path, "a", encoding="utf-8") as f:
-                    f.write(json.dumps(obj, ensure_ascii=False) + "\n")
+            # All output files go through one writer thread
+            writer = _AsyncWriter()
+            self._writer = writer
+            writer.append(output_jsonl, b"")  # create the stream file up front for tailing readers
+
+            def _write_jsonl(obj: dict):
+                # The writer flushes after each batch so tailing readers see partials right away
+                writer.append(output_jsonl, _dumps(obj) + b"\n")
+
+            # Aggregated dialogue: snapshot + finals since the snapshot in the delta log
+            agg = self._load_aggregate(output_json)
+            # agg["speakers"] stays sorted in place; the set answers membership
+            agg_speakers = set(agg["speakers"])
+            agg["speakers"] = sorted(agg_speakers)
+            delta_path = f"{output_json}.delta.jsonl"
+            last_snapshot = time.monotonic()
+
+            def _snapshot_aggregate():
+                # Serialized here: agg keeps changing while the writer works
+                writer.replace(output_json, _dumps(agg))
+                writer.truncate(delta_path)
+
+            # Newest segment id queued per speech span (keyed by the span's start sample)
+            latest_seq_by_span: Dict[int, int] = {}
 
-            def _emit_segment(is_final: bool, pcm_frames: list[bytes], start_sample: int):
-                if not pcm_frames:
+            def _emit_segment(is_final: bool, start_sample: int, end_sample: int, span: int):
+                if end_sample <= start_sample:
                     return
-                # Convert to numpy
-                pcm = b"".join(pcm_frames)
-                audio_np = np.frombuffer(pcm, dtype=np.int16)
+                audio_np = self._ring_slice(start_sample, end_sample)
 
                 # Timestamps
                 start_sec = start_sample / self.sample_rate
                 end_sec = (start_sample + len(audio_np)) / self.sample_rate
 
-                # Save to temporary WAV
-                tmp_name = f"audio_chunks/live_{self._sequence_id:06d}.wav"
-                os.makedirs("audio_chunks", exist_ok=True)
-                with wave.open(tmp_name, "wb") as wf:
-                    wf.setnchannels(self.channels)
-                    wf.setsampwidth(2)
-                    wf.setframerate(self.sample_rate)
-                    wf.writeframes(pcm)
+                # Diarization reads audio from disk, so only final segments may need a WAV
+                tmp_name = None
+                diarize = enable_diarization and end_sec - start_sec >= min_diarization_s
+                if is_final and (save_audio or diarize):
+                    if save_audio:
+                        tmp_name = f"audio_chunks/live_{self._sequence_id:06d}.wav"
+                    else:
+                        # Only needed until diarized: reuse a bounded set of names
+                        tmp_name = f"audio_chunks/live_{self._sequence_id % 256:03d}.wav"
+                    # The ring holds the first input channel only
+                    _write_wav(tmp_name, audio_np, 1, self.sample_rate)
 
                 seq_id = self._sequence_id
                 self._sequence_id += 1
+                latest_seq_by_span[span] = seq_id
 
                 # Put task for processing
-                self._segment_queue.put({
+                segment_queue.put({
                     "id": seq_id,
+                    "audio": audio_np,
                     "file": tmp_name,
                     "start": start_sec,
                     "end": end_sec,
                     "is_final": is_final,
-                    "output_json": output_json,
-                    "output_jsonl": output_jsonl,
+                    "span": span,
                     "voice_engine": voice_engine,
                     "enable_diarization": enable_diarization,
                 })
@@ -403,167 +848,276 @@ class AudioProcessor:
                     logger.debug(f"audio status: {status}")
 
                 # indata: float32 [-1..1] shape (frames, channels)
+                # Clamp and scale to int16 (avoids NaNs/overflows causing garbage text),
+                # writing straight into the ring buffer
                 mono = indata[:, 0]
-                # Clamp and scale to int16 to avoid NaNs/overflows causing garbage text
-                mono = np.clip(mono, -1.0, 1.0)
-                pcm16 = (mono * 32767.0).astype(np.int16).tobytes()
-
-                # Cut into 20ms frames
-                frame_size = state["frame_bytes"]
-                buffer = getattr(callback, "_buffer", b"") + pcm16
-                chunks = []
-                while len(buffer) >= frame_size:
-                    chunks.append(buffer[:frame_size])
-                    buffer = buffer[frame_size:]
-                callback._buffer = buffer
-
-                for frame in chunks:
-                    is_speech = vad.is_speech(frame, self.sample_rate)
-                    if is_speech:
-                        if not state["in_speech"]:
-                            # speech start
-                            state["in_speech"] = True
-                            state["speech_frames"] = []
-                            state["speech_start_sample"] = state["samples_seen"]
-                            state["silence_counter"] = 0
-                            state["last_emit_time"] = time.time()
-                        state["speech_frames"].append(frame)
-                        state["silence_counter"] = 0
-
-                        # Partial emit (use ~0.6s context for lower latency and better stability)
-                        if time.time() - state["last_emit_time"] >= state["partial_interval"]:
-                            max_frames = int(0.6 / 0.02)
-                            start_index = max(0, len(state["speech_frames"]) - max_frames)
-                            partial_frames = state["speech_frames"][start_index:]
-                            _emit_segment(False, partial_frames, state["speech_start_sample"] + start_index * state["frame_samples"]) 
-                            state["last_emit_time"] = time.time()
-
-                        # Limit maximum segment length
-                        if len(state["speech_frames"]) >= state["max_segment_frames"]:
-                            _emit_segment(True, state["speech_frames"], state["speech_start_sample"])
-                            state["in_speech"] = False
-                            state["speech_frames"] = []
-                            state["silence_counter"] = 0
-                    else:
-                        # silence
-                        if state["in_speech"]:
-                            state["silence_counter"] += 1
-                            if state["silence_counter"] >= state["post_silence_frames"] and len(state["speech_frames"]) >= state["min_speech_frames"]:
-                                _emit_segment(True, state["speech_frames"], state["speech_start_sample"])
-                                state["in_speech"] = False
-                                state["speech_frames"] = []
-                                state["silence_counter"] = 0
-
-                    state["samples_seen"] += state["frame_samples"]
-
-            # Segment processing thread
-            def worker():
-                while not self._stop_event.is_set():
-                    try:
-                        task = self._segment_queue.get(timeout=0.2)
-                    except queue.Empty:
+                ring = self._ring
+                ring_size = ring.shape[0]
+                pos = self._ring_write % ring_size
+                first = min(frames, ring_size - pos)
+                if pcm_kernel is not None:
+                    pcm_kernel(mono[:first], ring[pos:pos + first])
+                    if first < frames:
+                        pcm_kernel(mono[first:], ring[:frames - first])
+                else:
+                    if frames > self._f32_scratch.shape[0]:
+                        self._f32_scratch = np.empty(frames, dtype=np.float32)
+                    clipped = np.clip(mono, -1.0, 1.0, out=self._f32_scratch[:frames])
+                    np.multiply(clipped[:first], 32767.0, out=ring[pos:pos + first], casting="unsafe")
+                    if first < frames:
+                        np.multiply(clipped[first:], 32767.0, out=ring[:frames - first], casting="unsafe")
+                self._ring_write += frames
+
+                # Wake the VAD thread once a batch of 20ms frames is buffered
+                if (self._ring_write - self._ring_read) >= vad_batch_samples:
+                    with vad_cond:
+                        vad_cond.notify()
+
+            def _analyze(n_frames: int):
+                # Cut into 20ms frames (ring size is a multiple of the frame size, so a frame never wraps)
+                ring_size = self._ring.shape[0]
+                frame_size = state["frame_samples"]
+                if n_frames > self._vad_flags.shape[0]:
+                    self._vad_flags = np.zeros(n_frames, dtype=np.uint8)
+                    self._vad_actions = np.zeros(n_frames, dtype=np.uint8)
+                flags = self._vad_flags[:n_frames]
+                actions = self._vad_actions[:n_frames]
+                first_sample = self._ring_read
+                ring_bytes = self._ring_bytes
+                frame_bytes = frame_size * 2
+                for i in range(n_frames):
+                    start = ((first_sample + i * frame_size) % ring_size) * 2
+                    # webrtcvad accepts any bytes-like buffer, so hand it a view instead of a copy
+                    flags[i] = vad.is_speech(ring_bytes[start:start + frame_bytes], self.sample_rate)
+                self._ring_read += n_frames * frame_size
+
+                vad_fsm(flags, fsm_state, fsm_params, first_sample, actions)
+
+                for i in range(n_frames):
+                    act = actions[i]
+                    if not act:
                         continue
-                    try:
-                        seg_id = task["id"]
-                        file_path = task["file"]
-                        start = task["start"]
-                        end = task["end"]
-                        is_final = task["is_final"]
-                        engine = task["voice_engine"]
-                        out_json = task["output_json"]
-                        out_jsonl = task["output_jsonl"]
-
-                        # Transcription
-                        transcription = engine.transcriber.transcribe(file_path, "json")
-                        if not transcription:
-                            continue
-
-                        enable_diar = bool(task.get("enable_diarization", True)) and is_final
-                        if enable_diar:
-                            diar = engine.diarizer.diarize(file_path, transcription, reference_speaker=None)
-                            segments = diar.get("segments", []) if diar else []
-                        else:
-                            # Use raw transcription segments for faster updates (filter trivial fillers)
-                            segs = transcription.get("segments", [])
-                            segments = []
-                            for s in segs:
-                                text = (s.get("text", "") or "").strip()
-                                if not text:
-                                    continue
-                                low = text.lower().strip(" .!")
-                                if low in {"ok", "okay", "yeah", "uh", "um"}:
+                    frame_sample = first_sample + i * frame_size
+                    if act & _ACT_START:
+                        state["speech_start_sample"] = frame_sample
+                    if act & _ACT_APPEND:
+                        state["speech_end_sample"] = frame_sample + frame_size
+                    if act & _ACT_PARTIAL:
+                        # Use ~0.6s context for lower latency and better stability
+                        end = state["speech_end_sample"]
+                        span = state["speech_start_sample"]
+                        _emit_segment(False, max(span, end - partial_context_samples), end, span)
+                    if act & _ACT_FINAL:
+                        span = state["speech_start_sample"]
+                        _emit_segment(True, span, state["speech_end_sample"], span)
+
+            def vad_loop():
+                # VAD and segmentation run here, off the PortAudio callback
+                frame_size = state["frame_samples"]
+                while True:
+                    with vad_cond:
+                        vad_cond.wait_for(
+                            lambda: self._stop_event.is_set()
+                            or self._ring_write - self._ring_read >= vad_batch_samples,
+                            timeout=0.1,
+                        )
+                    n_frames = (self._ring_write - self._ring_read) // frame_size
+                    if n_frames:
+                        try:
+                            _analyze(n_frames)
+                        except Exception as e:
+                            logger.error(f"VAD error: {e}")
+                    elif self._stop_event.is_set():
+                        break
+
+            # Speaker cache for short finals: speaker -> [seconds spoken, id of last final]
+            speaker_stats: Dict[str, list] = {}
+
+            def _cached_speaker(seg_id: int) -> Optional[str]:
+                # Favour speakers with the most speech, discounted by how long ago they spoke
+                if not speaker_stats:
+                    return None
+                return max(speaker_stats.items(), key=lambda kv: kv[1][0] / (1 + seg_id - kv[1][1]))[0]
+
+            # Newest segment id published per speech span; outputs are written under publish_lock
+            published_seq_by_span: Dict[int, int] = {}
+            publish_lock = threading.Lock()
+            # Start of the newest span whose final was published; every earlier span is closed
+            closed_span = -1
+
+            def _is_stale(task: dict, seq_by_span: Dict[int, int]) -> bool:
+                # A partial is stale once its span is closed or a newer partial/final of it exists
+                return not task["is_final"] and (
+                    task["span"] < closed_span or seq_by_span.get(task["span"], -1) > task["id"]
+                )
+
+            def _process_segment(task: dict):
+                nonlocal last_snapshot, closed_span
+                try:
+                    if _is_stale(task, latest_seq_by_span):
+                        return
+                    seg_id = task["id"]
+                    file_path = task["file"]
+                    start = task["start"]
+                    end = task["end"]
+                    is_final = task["is_final"]
+                    engine = task["voice_engine"]
+
+                    # Transcription
+                    transcription = engine.transcriber.transcribe_array(task["audio"], self.sample_rate)
+                    if not transcription:
+                        return
+
+                    diar_requested = bool(task.get("enable_diarization", True)) and is_final
+                    enable_diar = diar_requested and file_path is not None and end - start >= min_diarization_s
+                    if enable_diar:
+                        diar = engine.diarizer.diarize(file_path, transcription, reference_speaker=None)
+                        segments = diar.get("segments", []) if diar else []
+                        for s in segments:
+                            stats = speaker_stats.setdefault(s.get("speaker", "UNKNOWN"), [0.0, seg_id])
+                            stats[0] += s.get("end", end) - s.get("start", start)
+                            stats[1] = seg_id
+                    else:
+                        # Short finals reuse the recent dominant speaker instead of diarizing
+                        raw_speaker = (_cached_speaker(seg_id) if diar_requested else None) or "USER"
+                        # Use raw transcription segments for faster updates (filter trivial fillers)
+                        segs = transcription.get("segments", [])
+                        segments = []
+                        last_lower = ""
+                        last_hash = 0
+                        for s in segs:
+                            # Cheapest rejection first, before any string work
+                            if s.get("no_speech_prob", 0.0) > 0.6:
+                                continue
+                            text = (s.get("text", "") or "").strip()
+                            if not text:
+                                continue
+                            cur_lower = text.casefold()
+                            if cur_lower.strip(" .!") in _FILLER_WORDS:
+                                continue
+                            # Drop if this segment is fully contained in the last one to reduce loops
+                            if segments:
+                                if hash(cur_lower) == last_hash and cur_lower == last_lower:
                                     continue
-                                if s.get("no_speech_prob", 0.0) > 0.6:
+                                if cur_lower.startswith(last_lower) or last_lower.endswith(cur_lower):
                                     continue
-                                # Drop if this segment is fully contained in the last one to reduce loops
-                                if segments:
-                                    prev = segments[-1]["text"].lower()
-                                    if text.lower().startswith(prev) or prev.endswith(text.lower()):
-                                        continue
-                                segments.append({
-                                    "start": s.get("start", start),
-                                    "end": s.get("end", end),
-                                    "text": text,
-                                    "speaker": "USER",
-                                })
-
-                        # Fallback: if diarization produced no segments, synthesize from transcription
-                        if not segments:
-                            tsegs = transcription.get("segments", [])
-                            if tsegs:
-                                segments = [{
-                                    "start": s.get("start", start),
-                                    "end": s.get("end", end),
-                                    "text": s.get("text", "").strip(),
-                                    "speaker": "SPEAKER_00",
-                                } for s in tsegs if s.get("text")]
-
-                        # If still empty - skip
-                        if not segments:
-                            continue
-
-                        # Join segment text (for short segments usually one segment)
-                        joined = {
-                            "id": seg_id,
-                            "start": segments[0].get("start", start),
-                            "end": segments[-1].get("end", end),
-                            "text": " ".join(s.get("text", "").strip() for s in segments).strip(),
-                            "speaker": segments[0].get("speaker", "UNKNOWN"),
-                            "is_final": is_final,
-                        }
+                            last_lower = cur_lower
+                            last_hash = hash(cur_lower)
+                            segments.append({
+                                "start": s.get("start", start),
+                                "end": s.get("end", end),
+                                "text": text,
+                                "speaker": raw_speaker,
+                            })
+
+                    # Fallback: if diarization produced no segments, synthesize from transcription
+                    if not segments:
+                        tsegs = transcription.get("segments", [])
+                        if tsegs:
+                            segments = [{
+                                "start": s.get("start", start),
+                                "end": s.get("end", end),
+                                "text": s.get("text", "").strip(),
+                                "speaker": "SPEAKER_00",
+                            } for s in tsegs if s.get("text")]
+
+                    # If still empty - skip
+                    if not segments:
+                        return
+
+                    # Join segment text (for short segments usually one segment)
+                    joined = {
+                        "id": seg_id,
+                        "start": segments[0].get("start", start),
+                        "end": segments[-1].get("end", end),
+                        "text": " ".join(s.get("text", "").strip() for s in segments).strip(),
+                        "speaker": segments[0].get("speaker", "UNKNOWN"),
+                        "is_final": is_final,
+                    }
+
+                    with publish_lock:
+                        # Partials may finish out of order; never publish one over a newer update
+                        if _is_stale(task, published_seq_by_span):
+                            return
+                        published_seq_by_span[task["span"]] = max(seg_id, published_seq_by_span.get(task["span"], -1))
 
                         # Write JSONL (update stream)
-                        _write_jsonl(out_jsonl, joined)
+                        _write_jsonl(joined)
 
-                        # Update aggregated JSON (only final)
+                        # Update aggregated dialogue (only final)
                         if is_final:
+                            # Earlier spans are closed; the watermark keeps their late partials
+                            # stale once their bookkeeping is gone
+                            closed_span = max(closed_span, task["span"])
+                            for span in [k for k in published_seq_by_span if k < task["span"]]:
+                                del published_seq_by_span[span]
+                            for span in [k for k in list(latest_seq_by_span) if k < task["span"]]:
+                                latest_seq_by_span.pop(span, None)
                             try:
-                                if os.path.exists(out_json):
-                                    with open(out_json, "r", encoding="utf-8") as f:
-                                        agg = json.load(f)
-                                else:
-                                    agg = {"segments": [], "speakers": [], "total_duration": 0.0, "audio_file": "realtime_recording", "metadata": {"backend": self.backend}}
-                                agg["segments"].append({k: joined[k] for k in ["start", "end", "text", "speaker"]})
-                                agg["speakers"] = sorted(list({*agg.get("speakers", []), joined["speaker"]}))
-                                agg["total_duration"] = float(sum(seg["end"] - seg["start"] for seg in agg["segments"]))
-                                with open(out_json, "w", encoding="utf-8") as f:
-                                    json.dump(agg, f, indent=2, ensure_ascii=False)
+                                final_seg = {k: joined[k] for k in ["start", "end", "text", "speaker"]}
+                                agg["segments"].append(final_seg)
+                                if final_seg["speaker"] not in agg_speakers:
+                                    agg_speakers.add(final_seg["speaker"])
+                                    bisect.insort(agg["speakers"], final_seg["speaker"])
+                                agg["total_duration"] = float(agg["total_duration"] + final_seg["end"] - final_seg["start"])
+                                writer.append(delta_path, _dumps(final_seg) + b"\n")
+                                if time.monotonic() - last_snapshot >= flush_interval_s:
+                                    _snapshot_aggregate()
+                                    last_snapshot = time.monotonic()
                             except Exception as ee:
                                 logger.warning(f"Error updating aggregated JSON: {ee}")
-                    except Exception as e:
-                        logger.error(f"Error processing segment: {e}")
-                    finally:
-                        self._segment_queue.task_done()
+                except Exception as e:
+                    logger.error(f"Error processing segment: {e}")
+
+            # Partials run on a small pool so a slow transcription doesn't back up the
+            # queue; finals get their own single thread, which keeps them in order
+            partial_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="nook-partial")
+            final_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="nook-final")
+
+            # Segment dispatch thread
+            def worker():
+                while True:
+                    # Blocks until a segment arrives; stop_recording() enqueues None
+                    task = segment_queue.get()
+                    if task is None:
+                        break
+                    if _is_stale(task, latest_seq_by_span):
+                        continue
+                    (final_pool if task["is_final"] else partial_pool).submit(_process_segment, task)
+
+                # Stopped: drain in-flight segments, write the final aggregate and release the output files
+                partial_pool.shutdown(wait=True)
+                final_pool.shutdown(wait=True)
+                try:
+                    _snapshot_aggregate()
+                except Exception as e:
+                    logger.warning(f"Error updating aggregated JSON: {e}")
+                writer.close()
+                if self._writer is writer:
+                    self._writer = None
+                try:
+                    st = os.stat(output_json)
+                    self._agg_cache = (output_json, (st.st_mtime_ns, st.st_size), agg)
+                except OSError:
+                    self._agg_cache = None
 
             worker_thread = threading.Thread(target=worker, daemon=True)
             worker_thread.start()
+            self._segment_worker = worker_thread
+
+            vad_thread = threading.Thread(target=vad_loop, name="nook-vad", daemon=True)
+            vad_thread.start()
+            self._vad_thread = vad_thread
+
+            # Pay JIT compilation and model warmup before audio starts flowing
+            self._warmup(voice_engine, enable_diarization)
 
             # Start input stream
             self._stream = sd.InputStream(
                 samplerate=self.sample_rate,
                 channels=self.channels,
                 dtype="float32",
-                blocksize=int(self.sample_rate * 0.01),  # 10ms frames for lower latency
+                blocksize=self._frame_samples,  # one 20ms VAD frame per callback; blocks never straddle the ring end
                 callback=callback,
             )
             self._stream.start()
@@ -575,38 +1129,190 @@ class AudioProcessor:
             logger.error(f"Error starting low-latency mode: {e}")
             return False
     
+    def _warmup(self, voice_engine, enable_diarization: bool = True):
+        """Run 0.5 s of silence through the low-latency pipeline so the first live segment doesn't stall"""
+        try:
+            silence = np.zeros(self.sample_rate // 2, dtype=np.float32)
+            pcm = np.empty(silence.shape[0], dtype=np.int16)
+            pcm_kernel = _get_pcm_kernel()
+            if pcm_kernel is not None:
+                pcm_kernel(silence, pcm)
+            else:
+                np.multiply(silence, 32767.0, out=pcm, casting="unsafe")
+            _get_vad_fsm()(
+                np.zeros(1, dtype=np.uint8),
+                np.zeros(5, dtype=np.int64),
+                np.array([1, 1, 1, 1, self._frame_samples], dtype=np.int64),
+                0,
+                np.zeros(1, dtype=np.uint8),
+            )
+            voice_engine.transcriber.transcribe_array(pcm, self.sample_rate)
+            # The diarizer only reads files; loading its models is the expensive part
+            if enable_diarization and not voice_engine.diarizer.is_initialized:
+                voice_engine.diarizer.initialize()
+        except Exception as e:
+            logger.warning(f"Low-latency warmup failed: {e}")
+
+    def _load_aggregate(self, output_json: str) -> Dict:
+        """Load the aggregated dialogue, folding in finals from an unflushed delta log"""
+        # Reuse the previous session's aggregate if the file is still exactly what it wrote
+        cache, self._agg_cache = self._agg_cache, None
+        if cache is not None and cache[0] == output_json:
+            try:
+                st = os.stat(output_json)
+                if (st.st_mtime_ns, st.st_size) == cache[1] and not os.path.getsize(f"{output_json}.delta.jsonl"):
+                    return cache[2]
+            except OSError:
+                pass
+
+        try:
+            with open(output_json, "r", encoding="utf-8") as f:
+                agg = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            agg = {"segments": [], "speakers": [], "total_duration": 0.0, "audio_file": "realtime_recording", "metadata": {"backend": self.backend}}
+        agg.setdefault("segments", [])
+        agg.setdefault("speakers", [])
+        agg.setdefault("total_duration", 0.0)
+
+        try:
+            with open(f"{output_json}.delta.jsonl", "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seg = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn last line
+                    agg["segments"].append(seg)
+                    agg["total_duration"] = float(agg["total_duration"] + seg["end"] - seg["start"])
+                    if seg["speaker"] not in agg["speakers"]:
+                        agg["speakers"].append(seg["speaker"])
+        except FileNotFoundError:
+            pass
+        return agg
+
+    def _ring_slice(self, start_sample: int, end_sample: int) -> np.ndarray:
+        """Copy absolute sample range [start_sample, end_sample) out of the ring buffer"""
+        ring = self._ring
+        size = ring.shape[0]
+        start = start_sample % size
+        n = end_sample - start_sample
+        if start + n <= size:
+            return ring[start:start + n].copy()
+        return np.concatenate((ring[start:], ring[:start + n - size]))
+
     def _recording_loop(
         self,
         voice_engine,
         output_file: str,
-        save_audio: bool
+        save_audio: bool,
+        flush_interval_s: float = 5.0
     ):
-        """Main recording and processing loop"""
+        """Main recording loop; transcription and diarization run as pipeline stages behind it"""
         chunk_idx = 0
         all_results = []
+        speakers: Dict[str, None] = {}  # ordered set: speakers in order of first appearance
+        total_duration = 0.0
+        last_snapshot = None
+        writer = _AsyncWriter()
+        # Segments since the last snapshot are appended here (same layout as the low-latency delta log)
+        delta_path = f"{output_file}.delta.jsonl"
+        writer.truncate(delta_path)
+        # Diarizers other than the heuristic one read the chunk from disk
+        needs_file = getattr(voice_engine.diarizer, "method", None) != "simple_heuristic"
+        chunk_path = "audio_chunks/chunk_{:03d}.wav".format
+        wav_writer = ThreadPoolExecutor(max_workers=1) if needs_file or save_audio else None
+        # save_audio keeps the whole session in one WAV instead of a file per chunk
+        session_wav = None
+        if save_audio:
+            try:
+                session_wav = _SessionWav(
+                    f"audio_chunks/session_{time.strftime('%Y%m%d_%H%M%S')}.wav", self.channels, self.sample_rate
+                )
+            except OSError as e:
+                logger.error(f"Error creating session WAV: {e}")
+        
+        # Stages: record (this thread) -> transcribe -> diarize + aggregate; None ends each stage.
+        # The small queues push back on recording when compute falls behind.
+        transcribe_q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=2)
+        diarize_q: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=2)
+        
+        # A failing chunk is logged and skipped; a dead stage would leave the recorder
+        # blocked on a full queue and stop_recording waiting on join() forever
+        def transcribe_stage():
+            try:
+                while True:
+                    item = transcribe_q.get()
+                    if item is None:
+                        return
+                    try:
+                        idx, audio, chunk_file, wav_future = item
+                        transcription = self._transcribe_chunk(voice_engine, audio, self.sample_rate)
+                        if transcription:
+                            diarize_q.put((idx, transcription, chunk_file, wav_future))
+                    except Exception as e:
+                        logger.error(f"Error transcribing chunk: {e}")
+                        continue
+            finally:
+                diarize_q.put(None)
+        
+        def diarize_stage():
+            nonlocal total_duration, last_snapshot
+            while True:
+                item = diarize_q.get()
+                if item is None:
+                    return
+                try:
+                    idx, transcription, chunk_file, wav_future = item
+                    result = self._diarize_chunk(voice_engine, transcription, chunk_file, wav_future)
+                    if not result:
+                        continue
+                    all_results.extend(result)
+                    for seg in result:
+                        speakers.setdefault(seg['speaker'], None)
+                        total_duration += seg['end'] - seg['start']
+                    writer.append(delta_path, b"".join(_dumps(seg) + b"\n" for seg in result))
+                    
+                    # Snapshot at most every flush_interval_s; until then the delta log has the new segments
+                    now = time.monotonic()
+                    if last_snapshot is None or now - last_snapshot >= flush_interval_s:
+                        self._save_intermediate_result(all_results, output_file, speakers, total_duration, writer)
+                        writer.truncate(delta_path)
+                        last_snapshot = now
+                    
+                    # Output last lines
+                    for seg in result:
+                        logger.info(f"[{seg['speaker']}] {seg['text']}")
+                except Exception as e:
+                    logger.error(f"Error diarizing chunk: {e}")
+                    continue
+        
+        stages = [
+            threading.Thread(target=transcribe_stage, name="nook-chunk-transcribe", daemon=True),
+            threading.Thread(target=diarize_stage, name="nook-chunk-diarize", daemon=True),
+        ]
+        for stage in stages:
+            stage.start()
         
         try:
             while self.is_recording:
-                # Write chunk
-                chunk_file = f"audio_chunks/chunk_{chunk_idx:04d}.wav"
-                logger.info(f"Writing chunk {chunk_idx}: {chunk_file}")
+                # Record chunk into memory
+                logger.info(f"Recording chunk {chunk_idx}")
+                audio = self._record_chunk()
                 
-                if self._record_chunk(chunk_file):
-                    # Process chunk
-                    result = self._process_chunk(voice_engine, chunk_file)
-                    
-                    if result:
-                        all_results.extend(result)
-                        
-                        # Save intermediate result
-                        self._save_intermediate_result(all_results, output_file)
-                        
-                        # Output last lines
-                        for item in result:
-                            logger.info(f"[{item['speaker']}] {item['text']}")
+                if audio is not None:
+                    # The capture buffer is reused for the next chunk, so the pipeline gets its own copy
+                    audio = audio.copy()
+                    wav_future = None
+                    chunk_file = None
+                    if session_wav is not None:
+                        wav_writer.submit(session_wav.write, audio.tobytes())
+                    if needs_file:
+                        # Only the diarizer reads these, so the names rotate over 256 slots
+                        chunk_file = chunk_path(chunk_idx % 256)
+                        wav_future = wav_writer.submit(self._write_chunk_wav, chunk_file, audio)
                     
+                    transcribe_q.put((chunk_idx, audio, chunk_file, wav_future))
                     chunk_idx += 1
-                else:
+                elif self.is_recording:
                     logger.warning("Error recording chunk")
                     time.sleep(1)
                     
@@ -616,108 +1322,182 @@ class AudioProcessor:
             logger.error(f"Error in recording loop: {e}")
         finally:
             self.is_recording = False
+            self._close_capture_stream()
+            # Let the stages finish the chunks already recorded
+            transcribe_q.put(None)
+            for stage in stages:
+                stage.join()
+            if wav_writer is not None:
+                wav_writer.shutdown(wait=True)
+            if session_wav is not None:
+                try:
+                    session_wav.close()
+                    logger.info(f"Session audio saved to: {session_wav.path}")
+                except OSError as e:
+                    logger.error(f"Error finalizing session WAV: {e}")
             logger.info("Real-time processing stopped")
             
             # Save final result
             if all_results:
-                self._save_intermediate_result(all_results, output_file)
+                self._save_intermediate_result(all_results, output_file, speakers, total_duration, writer)
+                writer.truncate(delta_path)
                 logger.info(f"Final result saved to: {output_file}")
+            writer.close()
     
-    def _record_chunk(self, filename: str) -> bool:
-        """Record one audio chunk"""
+    def _record_chunk(self) -> Optional[np.ndarray]:
+        """Record one audio chunk as int16 frames of shape (frames, channels)"""
         try:
             if self.backend == "sounddevice":
-                return self._record_chunk_sounddevice(filename)
+                return self._record_chunk_sounddevice()
             elif self.backend == "pyaudio":
-                return self._record_chunk_pyaudio(filename)
+                return self._record_chunk_pyaudio()
             else:
                 logger.error(f"Unsupported backend: {self.backend}")
-                return False
+                return None
                 
         except Exception as e:
             logger.error(f"Error recording chunk: {e}")
-            return False
+            return None
+    
+    def _write_chunk_wav(self, filename: str, audio: np.ndarray):
+        """Write int16 frames to a WAV file"""
+        try:
+            try:
+                _write_wav(filename, audio, self.channels, self.sample_rate)
+            except FileNotFoundError:
+                # The directory was removed mid-session (e.g. a purge); recreate it rather than drop the chunk
+                os.makedirs(os.path.dirname(filename) or ".", exist_ok=True)
+                _write_wav(filename, audio, self.channels, self.sample_rate)
+        except Exception as e:
+            logger.error(f"Error writing {filename}: {e}")
+            raise
     
-    def _record_chunk_sounddevice(self, filename: str) -> bool:
+    def _record_chunk_sounddevice(self) -> Optional[np.ndarray]:
         """Record chunk via sounddevice"""
         try:
-            import sounddevice as sd
+            chunk_frames = int(self.chunk_duration * self.sample_rate)
             
-            # Record audio
-            audio_data = sd.rec(
-                int(self.chunk_duration * self.sample_rate),
-                samplerate=self.sample_rate,
-                channels=self.channels,
-                dtype=np.int16
-            )
-            
-            # Wait for recording to complete
-            sd.wait()
+            # Open one input stream for the session; capture keeps running while chunks are processed
+            if self._capture_stream is None:
+                ring = _CaptureRing(chunk_frames * 2, self.channels)
+                
+                def capture_callback(indata, frames, time_info, status):
+                    if status:
+                        logger.debug(f"audio status: {status}")
+                    ring.write(indata)
+                
+                self._capture_ring = ring
+                self._capture_stream = sd.InputStream(
+                    samplerate=self.sample_rate,
+                    channels=self.channels,
+                    dtype="int16",
+                    callback=capture_callback,
+                )
+                self._capture_stream.start()
             
-            # Save to WAV file
-            with wave.open(filename, 'wb') as wav_file:
-                wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(audio_data.tobytes())
+            # Take the next chunk from the ring
+            if self._rec_buf_i16.shape != (chunk_frames, self.channels):
+                self._rec_buf_i16 = np.empty((chunk_frames, self.channels), dtype=np.int16)
+            audio_data = self._rec_buf_i16
+            ring = self._capture_ring
+            if ring is None or not ring.read_into(audio_data, timeout=self.chunk_duration + 5.0):
+                if self.is_recording:
+                    logger.warning("No audio captured for chunk")
+                return None
             
-            return True
+            return audio_data
             
         except Exception as e:
             logger.error(f"sounddevice recording error: {e}")
-            return False
+            return None
     
-    def _record_chunk_pyaudio(self, filename: str) -> bool:
+    def _record_chunk_pyaudio(self) -> Optional[np.ndarray]:
         """Record chunk via pyaudio"""
         try:
+            chunk_frames = int(self.chunk_duration * self.sample_rate)
+            frame_bytes = 2 * self.channels
+            total_bytes = chunk_frames * frame_bytes
+            if len(self._rec_buf_bytes) != total_bytes:
+                self._rec_buf_bytes = bytearray(total_bytes)
+            buf = memoryview(self._rec_buf_bytes)
+            block = 1024
+            
             # Open stream
             stream = self.audio_backend.open(
                 format=pyaudio.paInt16,
                 channels=self.channels,
                 rate=self.sample_rate,
                 input=True,
-                frames_per_buffer=self.chunk_samples
+                frames_per_buffer=block
             )
             
-            # Write data
-            frames = []
-            for _ in range(0, int(self.sample_rate / self.chunk_samples * self.chunk_duration)):
-                data = stream.read(self.chunk_samples)
-                frames.append(data)
+            # Fill the reused buffer in place instead of collecting and joining blocks
+            pos = 0
+            while pos < total_bytes:
+                n = min(block, (total_bytes - pos) // frame_bytes)
+                data = stream.read(n, exception_on_overflow=False)
+                buf[pos:pos + len(data)] = data
+                pos += len(data)
             
             # Close stream
             stream.stop_stream()
             stream.close()
             
-            # Save to WAV file
-            with wave.open(filename, 'wb') as wav_file:
-                wav_file.setnchannels(self.channels)
-                wav_file.setsampwidth(2)  # 16-bit
-                wav_file.setframerate(self.sample_rate)
-                wav_file.writeframes(b''.join(frames))
-            
-            return True
+            return np.frombuffer(self._rec_buf_bytes, dtype=np.int16).reshape(-1, self.channels)
             
         except Exception as e:
             logger.error(f"pyaudio recording error: {e}")
-            return False
+            return None
     
     def _process_chunk(
         self,
         voice_engine,
-        chunk_file: str
+        audio: np.ndarray,
+        sr: int,
+        chunk_file: Optional[str] = None,
+        wav_future=None
     ) -> Optional[List[Dict]]:
-        """Process recorded chunk"""
+        """Process recorded chunk from memory"""
+        transcription = self._transcribe_chunk(voice_engine, audio, sr)
+        if not transcription:
+            return None
+        return self._diarize_chunk(voice_engine, transcription, chunk_file, wav_future)
+    
+    def _transcribe_chunk(self, voice_engine, audio: np.ndarray, sr: int) -> Optional[Dict]:
+        """Transcribe a recorded chunk of int16 frames"""
         try:
-            # Transcribe
-            transcription = voice_engine.transcriber.transcribe(chunk_file, "json")
+            # Transcribe straight from the frames; mono int16 is scaled once inside transcribe_array
+            if audio.ndim == 1 or audio.shape[1] == 1:
+                mono = audio.reshape(-1)
+            else:
+                # Downmix into a reused float32 buffer without an int16 round-trip
+                n, channels = audio.shape
+                if self._chunk_f32.shape[0] < n:
+                    self._chunk_f32 = np.empty(n, dtype=np.float32)
+                mono = self._chunk_f32[:n]
+                np.sum(audio, axis=1, dtype=np.float32, out=mono)
+                mono *= np.float32(1.0 / (32768.0 * channels))
+            transcription = voice_engine.transcriber.transcribe_array(mono, sr, "json")
             if not transcription:
-                logger.warning(f"Failed to transcribe: {chunk_file}")
-                return None
-            
-            # Diarize
+                logger.warning("Failed to transcribe chunk")
+            return transcription
+        except Exception as e:
+            logger.error(f"Error processing chunk: {e}")
+            return None
+    
+    def _diarize_chunk(
+        self,
+        voice_engine,
+        transcription: Dict,
+        chunk_file: Optional[str] = None,
+        wav_future=None
+    ) -> Optional[List[Dict]]:
+        """Diarize a transcribed chunk; file-based diarizers wait for the background WAV write"""
+        try:
+            if wav_future is not None:
+                wav_future.result()
             diarization_result = voice_engine.diarizer.diarize(
-                chunk_file,
+                chunk_file or "",
                 transcription
             )
             
@@ -730,14 +1510,26 @@ class AudioProcessor:
             logger.error(f"Error processing chunk: {e}")
             return None
     
-    def _save_intermediate_result(self, results: List[Dict], output_file: str):
-        """Save intermediate result"""
+    def _save_intermediate_result(
+        self,
+        results: List[Dict],
+        output_file: str,
+        speakers: Optional[Dict[str, None]] = None,
+        total_duration: Optional[float] = None,
+        writer: Optional[_AsyncWriter] = None
+    ):
+        """Save intermediate result; speakers and total_duration are running totals kept by the caller"""
         try:
+            if speakers is None:
+                speakers = dict.fromkeys(seg['speaker'] for seg in results)
+            if total_duration is None:
+                total_duration = sum(seg['end'] - seg['start'] for seg in results)
+            
             # Create result structure
             final_result = {
                 'segments': results,
-                'speakers': list(set(seg['speaker'] for seg in results)),
-                'total_duration': sum(seg['end'] - seg['start'] for seg in results),
+                'speakers': list(speakers),
+                'total_duration': float(total_duration),
                 'audio_file': 'realtime_recording',
                 'metadata': {
                     'timestamp': time.time(),
@@ -746,9 +1538,14 @@ class AudioProcessor:
                 }
             }
             
-            # Save to JSON
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(final_result, f, indent=2, ensure_ascii=False)
+            data = _dumps(final_result)
+            if writer is not None:
+                writer.replace(output_file, data)
+            else:
+                tmp_path = f"{output_file}.tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, output_file)
                 
         except Exception as e:
             logger.error(f"Error saving intermediate result: {e}")
@@ -764,14 +1561,37 @@ class AudioProcessor:
                 self._stream = None
         except Exception:
             pass
+        # Let the VAD thread finish emitting before the worker sees the sentinel
+        vad_thread, self._vad_thread = self._vad_thread, None
+        if vad_thread is not None and vad_thread is not threading.current_thread():
+            vad_thread.join(timeout=2.0)
+        # Wake the low-latency worker; it finishes queued segments, writes the
+        # aggregated JSON and exits
+        self._segment_queue.put(None)
+        worker, self._segment_worker = self._segment_worker, None
+        if worker is not None and worker is not threading.current_thread():
+            worker.join(timeout=10.0)
+        self._close_capture_stream()
         logger.info("Recording stopped")
+
+    def _close_capture_stream(self):
+        """Close the chunked-recording input stream and release any waiting reader"""
+        stream, self._capture_stream = self._capture_stream, None
+        try:
+            if stream is not None:
+                stream.stop()
+                stream.close()
+        except Exception:
+            pass
+        ring, self._capture_ring = self._capture_ring, None
+        if ring is not None:
+            ring.close()
     
     def get_audio_devices(self) -> List[Dict]:
         """Return list of available audio devices"""
         try:
             if self.backend == "sounddevice":
-                import sounddevice as sd
-                devices = sd.query_devices()
+                devices = self._query_devices()
                 return [
                     {
                         'id': i,
@@ -808,8 +1628,8 @@ class AudioProcessor:
         """Set audio device"""
         try:
             if self.backend == "sounddevice":
-                import sounddevice as sd
                 sd.default.device = device_id
+                self._devices_cache = None
                 logger.info(f"Device set: {device_id}")
                 return True
             else:
@@ -835,8 +1655,7 @@ class AudioProcessor:
         """Check microphone availability"""
         try:
             if self.backend == "sounddevice":
-                import sounddevice as sd
-                devices = sd.query_devices()
+                devices = self._query_devices()
                 input_devices = [d for d in devices if d.get('max_input_channels', 0) > 0]
                 return len(input_devices) > 0
             return False
@@ -871,8 +1690,8 @@ class AudioProcessor:
             }
             
             # Save empty result
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(empty_result, f, indent=2, ensure_ascii=False)
+            with open(output_file, 'wb') as f:
+                f.write(_dumps(empty_result, indent=True))
             
             logger.info("Fallback mode started (without microphone)")
             return True
@@ -66,7 +66,7 @@ Usage examples:
     
     # Common parameters
     for subparser in [transcribe_parser, diarize_parser, realtime_parser, stream_parser]:
-        subparser.add_argument("--device", default="auto", help="Device (cpu/gpu/auto)")
+        subparser.add_argument("--device", default="auto", help="Device (cpu/gpu/auto); model runs int8-quantized (int8_float16 on GPU): ~2x faster, slightly less accurate")
         subparser.add_argument("--verbose", "-v", action="store_true", help="Verbose output")
     
     args = parser.parse_args()
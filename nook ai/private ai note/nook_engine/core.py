@@ -2,16 +2,19 @@
 Main NookEngine class - unified entry point for all operations
 """
 
-import json
+import asyncio
+import functools
 import os
 import time
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, fields
+
+import numpy as np
 
 from .transcriber import WhisperTranscriber
 from .diarizer import SpeakerDiarizer
-from .audio_processor import AudioProcessor
+from .audio_processor import AudioProcessor, _dumps
 
 
 @dataclass
@@ -35,6 +38,39 @@ class DialogueResult:
     metadata: Dict
 
 
+_SEGMENT_FIELDS = tuple(f.name for f in fields(TranscriptionSegment))
+_RESULT_FIELDS = tuple(f.name for f in fields(DialogueResult))
+
+
+def _result_to_dict(result) -> Dict:
+    """asdict() for results, built directly from attributes for DialogueResult (no recursive walk)"""
+    if not isinstance(result, DialogueResult):
+        return asdict(result)
+    data = {name: getattr(result, name) for name in _RESULT_FIELDS}
+    data['segments'] = [
+        {name: getattr(seg, name) for name in _SEGMENT_FIELDS} for seg in result.segments
+    ]
+    data['speakers'] = list(result.speakers)
+    data['metadata'] = dict(result.metadata)
+    return data
+
+
+@functools.lru_cache(maxsize=64)
+def _ensure_dir(path: str) -> None:
+    """makedirs once per output directory (cache is cleared when a save fails)"""
+    os.makedirs(path or ".", exist_ok=True)
+
+
+def _open_output(path: str, mode: str, **kwargs):
+    """open() for writing, recreating the directory once if it was removed after _ensure_dir cached it"""
+    try:
+        return open(path, mode, **kwargs)
+    except FileNotFoundError:
+        _ensure_dir.cache_clear()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        return open(path, mode, **kwargs)
+
+
 class NookEngine:
     """
     Main engine for speech transcription and diarization
@@ -62,10 +98,10 @@ class NookEngine:
         Args:
             model_size: Whisper model size (tiny, base, small, medium, large)
             device: Computing device (cpu, gpu, auto)
-            compute_type: Computation type (int8, float16, float32)
+            compute_type: Computation type (int8, int8_float16, float16, float32; auto = int8 on CPU, int8_float16 on GPU)
             language: Recognition language
             diarization_threshold: Threshold for speaker separation
-            interruption_gap: Maximum gap in seconds to consider as interruption
+            interruption_gap: Pause in seconds that ends a speaker's run in continuous mode (shorter pauses are merged)
             continuous_mode: Enable continuous transcription mode
         """
         self.model_size = model_size
@@ -172,7 +208,8 @@ class NookEngine:
     def diarize_audio(
         self,
         audio_file: Union[str, Path],
-        reference_speaker: Optional[str] = None
+        reference_speaker: Optional[str] = None,
+        reference_embedding: Optional[np.ndarray] = None
     ) -> Optional[DialogueResult]:
         """
         Perform audio diarization with speaker separation
@@ -180,6 +217,7 @@ class NookEngine:
         Args:
             audio_file: Path to audio file
             reference_speaker: Path to reference voice of main speaker
+            reference_embedding: Precomputed reference voice embedding (skips loading reference_speaker)
             
         Returns:
             Diarization result with speaker separation
@@ -201,7 +239,8 @@ class NookEngine:
             diarization_result = self.diarizer.diarize(
                 audio_file,
                 transcription,
-                reference_speaker
+                reference_speaker,
+                reference_embedding
             )
             
             if diarization_result:
@@ -214,7 +253,30 @@ class NookEngine:
         except Exception as e:
             print(f"❌ Error during diarization: {e}")
             return None
-    
+
+    def merge_continuous(
+        self,
+        segments: List[Dict],
+        interruption_gap: Optional[float] = None
+    ) -> List[Dict]:
+        """
+        Merge regular-mode segments into continuous transcription
+
+        Continuous mode is a post-processing step over aligned segments, so a
+        single diarization run can produce both views without re-running the models.
+
+        Args:
+            segments: Segments from diarize_audio() with continuous_mode=False
+            interruption_gap: Adjacent same-speaker segments are merged while
+                next.start - prev.end is below this (defaults to engine setting)
+
+        Returns:
+            List of merged segments
+        """
+        if interruption_gap is None:
+            interruption_gap = self.interruption_gap
+        return self.diarizer._create_continuous_transcription(segments, interruption_gap)
+
     def process_realtime(
         self,
         output_file: str = "realtime_dialogue.json",
@@ -314,49 +376,167 @@ class NookEngine:
         """
         try:
             # Create directory if needed
-            os.makedirs(os.path.dirname(output_file) or ".", exist_ok=True)
+            _ensure_dir(os.path.dirname(output_file))
             
             if format == "json":
                 if hasattr(result, '__dict__'):
-                    data = asdict(result)
+                    data = _result_to_dict(result)
                 else:
                     data = result
                 
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    json.dump(data, f, indent=2, ensure_ascii=False)
+                # orjson (when installed) encodes in one C call and handles NumPy values
+                payload = _dumps(data, indent=True)
+                with _open_output(output_file, 'wb') as f:
+                    f.write(payload)
                     
             elif format == "txt":
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    if hasattr(result, 'segments'):
-                        for seg in result.segments:
-                            f.write(f"[{seg.speaker or 'UNKNOWN'}] {seg.text}\n")
-                    else:
-                        f.write(str(result))
+                if hasattr(result, 'segments'):
+                    body = "".join(
+                        f"[{seg.speaker or 'UNKNOWN'}] {seg.text}\n" for seg in result.segments
+                    )
+                else:
+                    body = str(result)
+                with _open_output(output_file, 'w', encoding='utf-8') as f:
+                    f.write(body)
                         
             elif format == "srt":
-                with open(output_file, 'w', encoding='utf-8') as f:
-                    if hasattr(result, 'segments'):
-                        for i, seg in enumerate(result.segments):
-                            f.write(f"{i+1}\n")
-                            f.write(f"{self._format_time(seg.start)} --> {self._format_time(seg.end)}\n")
-                            f.write(f"[{seg.speaker or 'UNKNOWN'}] {seg.text}\n\n")
-                    else:
-                        f.write(str(result))
+                if hasattr(result, 'segments'):
+                    segments = result.segments
+                    starts = self._format_times([seg.start for seg in segments])
+                    ends = self._format_times([seg.end for seg in segments])
+                    body = "".join(
+                        f"{i+1}\n{start} --> {end}\n[{seg.speaker or 'UNKNOWN'}] {seg.text}\n\n"
+                        for i, (seg, start, end) in enumerate(zip(segments, starts, ends))
+                    )
+                else:
+                    body = str(result)
+                with _open_output(output_file, 'w', encoding='utf-8') as f:
+                    f.write(body)
             
             print(f"💾 Result saved to: {output_file}")
             return True
             
         except Exception as e:
+            # The directory may have been removed since it was cached
+            _ensure_dir.cache_clear()
             print(f"❌ Save error: {e}")
             return False
     
+    async def save_result_async(
+        self,
+        result: Union[Dict, DialogueResult],
+        output_file: str,
+        format: str = "json"
+    ) -> bool:
+        """
+        save_result on a worker thread, so servers keep their event loop free during the write
+        
+        Args:
+            result: Result to save
+            output_file: Path to output file
+            format: Save format (json, txt, srt)
+            
+        Returns:
+            True if successfully saved
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, functools.partial(self.save_result, result, output_file, format)
+        )
+    
+    def save_result_multi(
+        self,
+        result: Union[Dict, DialogueResult],
+        base_path: str,
+        formats: Tuple[str, ...] = ("json", "txt", "srt")
+    ) -> bool:
+        """
+        Save result in several formats with a single pass over segments
+
+        Args:
+            result: Result to save
+            base_path: Output path; its extension is replaced by each format
+            formats: Formats to write (json, txt, srt)
+
+        Returns:
+            True if successfully saved
+        """
+        handles = {}
+        try:
+            if hasattr(result, '__dict__'):
+                data = _result_to_dict(result)
+            else:
+                data = result
+            segments = data.get('segments', [])
+
+            base = os.path.splitext(str(base_path))[0]
+            _ensure_dir(os.path.dirname(base))
+
+            for fmt in formats:
+                if fmt in ("json", "txt", "srt"):
+                    handles[fmt] = _open_output(f"{base}.{fmt}", 'w', encoding='utf-8', buffering=1 << 20)
+
+            json_f = handles.get("json")
+            txt_f = handles.get("txt")
+            srt_f = handles.get("srt")
+
+            if json_f:
+                json_f.write('{"segments": [')
+            if srt_f:
+                srt_starts = self._format_times([seg['start'] for seg in segments])
+                srt_ends = self._format_times([seg['end'] for seg in segments])
+
+            for i, seg in enumerate(segments):
+                speaker = seg.get('speaker') or 'UNKNOWN'
+                text = seg.get('text', '')
+                if json_f:
+                    if i:
+                        json_f.write(", ")
+                    json_f.write(_dumps(seg).decode("utf-8"))
+                if txt_f:
+                    txt_f.write(f"[{speaker}] {text}\n")
+                if srt_f:
+                    srt_f.write(
+                        f"{i+1}\n"
+                        f"{srt_starts[i]} --> {srt_ends[i]}\n"
+                        f"[{speaker}] {text}\n\n"
+                    )
+
+            if json_f:
+                rest = {k: v for k, v in data.items() if k != 'segments'}
+                if rest:
+                    json_f.write("], " + _dumps(rest).decode("utf-8")[1:])
+                else:
+                    json_f.write("]}")
+
+            for fmt, f in handles.items():
+                f.close()
+                print(f"💾 Result saved to: {base}.{fmt}")
+            return True
+
+        except Exception as e:
+            for f in handles.values():
+                f.close()
+            _ensure_dir.cache_clear()
+            print(f"❌ Save error: {e}")
+            return False
+
     def _format_time(self, seconds: float) -> str:
         """Format time to SRT format (HH:MM:SS,mmm)"""
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
-        millisecs = int((seconds % 1) * 1000)
-        return f"{hours:02d}:{minutes:02d}:{secs:02d},{millisecs:03d}"
+        return self._format_times([seconds])[0]
+    
+    @staticmethod
+    def _format_times(seconds: List[float]) -> List[str]:
+        """Format many times to SRT format at once (fields computed as arrays)"""
+        s = np.asarray(seconds, dtype=np.float64)
+        hours = (s // 3600).astype(np.int64).tolist()
+        minutes = ((s % 3600) // 60).astype(np.int64).tolist()
+        secs = (s % 60).astype(np.int64).tolist()
+        millisecs = ((s % 1) * 1000).astype(np.int64).tolist()
+        return [
+            f"{h:02d}:{m:02d}:{sec:02d},{ms:03d}"
+            for h, m, sec, ms in zip(hours, minutes, secs, millisecs)
+        ]
     
     def get_model_info(self) -> Dict:
         """Return information about loaded models"""
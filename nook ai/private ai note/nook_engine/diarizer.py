@@ -5,17 +5,131 @@ Supports various algorithms: Resemblyzer, pyannote.audio, speaker-diarization
 
 import os
 import json
+import hashlib
+import functools
+import math
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
-import librosa
+from numpy.lib.stride_tricks import sliding_window_view
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple, Union
 import logging
 
+try:
+    import soundfile as sf  # Block-wise decoding without loading the whole file first
+    _HAS_SOUNDFILE = True
+except Exception:
+    _HAS_SOUNDFILE = False
+
+try:
+    import numba  # Optional JIT for the clustering and overlap loops
+    _HAS_NUMBA = True
+except Exception:
+    _HAS_NUMBA = False
+
 # Logging setup
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+def _simple_cluster_py(embeddings, threshold, labels):
+    """Start a new speaker whenever consecutive embeddings' dot product drops below threshold."""
+    labels[0] = 0
+    top = 0
+    for i in range(1, embeddings.shape[0]):
+        sim = 0.0
+        for k in range(embeddings.shape[1]):
+            sim += embeddings[i, k] * embeddings[i - 1, k]
+        if sim < threshold:
+            top += 1
+            labels[i] = top
+        else:
+            labels[i] = labels[i - 1]
+
+
+def _best_overlap_py(seg_starts, seg_ends, diar_starts, diar_ends, diar_max_ends, best):
+    """
+    For each [start, end) segment, the index of the diarization turn with the largest overlap (-1 if none).
+    Turns are sorted by start; diar_max_ends is the running max of their ends, so only
+    turns in [first max_end > start, last start < end) can overlap.
+    """
+    for i in range(seg_starts.shape[0]):
+        s = seg_starts[i]
+        e = seg_ends[i]
+        lo = np.searchsorted(diar_max_ends, s, side="right")
+        hi = np.searchsorted(diar_starts, e, side="left")
+        best_j = -1
+        best_overlap = 0.0
+        for j in range(lo, hi):
+            overlap = min(e, diar_ends[j]) - max(s, diar_starts[j])
+            if overlap > best_overlap:
+                best_overlap = overlap
+                best_j = j
+        best[i] = best_j
+
+
+@functools.lru_cache(maxsize=None)
+def _get_pyannote_pipeline(model_name: str, device: str):
+    """Load a pyannote pipeline once per (model, device) and share it between diarizers"""
+    import torch
+    from pyannote.audio.pipelines.speaker_diarization import SpeakerDiarization
+    
+    pipeline = SpeakerDiarization.from_pretrained(model_name)
+    pipeline.to(torch.device(device))
+    return pipeline
+
+
+def _best_overlap_np(seg_starts, seg_ends, diar_starts, diar_ends, best, max_cells=1 << 20):
+    """Vectorized _best_overlap_py: overlap matrix per block of segments, argmax per row"""
+    rows = max(1, max_cells // max(1, diar_starts.shape[0]))
+    for lo in range(0, seg_starts.shape[0], rows):
+        s = seg_starts[lo:lo + rows]
+        e = seg_ends[lo:lo + rows]
+        overlap = np.minimum.outer(e, diar_ends) - np.maximum.outer(s, diar_starts)
+        j = np.argmax(overlap, axis=1)
+        best[lo:lo + rows] = np.where(overlap[np.arange(len(j)), j] > 0.0, j, -1)
+
+
+# Above this many windows the silhouette search is spread over worker threads
+_PARALLEL_SILHOUETTE_MIN = 200
+
+
+def _silhouette_for_count(distances: np.ndarray, dendrogram: np.ndarray, n_clusters: int) -> Optional[float]:
+    """Silhouette score of the n_clusters cut of dendrogram, None if it cannot be scored"""
+    try:
+        from scipy.cluster.hierarchy import fcluster
+        from sklearn.metrics import silhouette_score
+        
+        labels = fcluster(dendrogram, t=n_clusters, criterion='maxclust')
+        return float(silhouette_score(distances, labels, metric='precomputed'))
+    except Exception:
+        return None
+
+
+def _parallel_silhouettes(distances: np.ndarray, dendrogram: np.ndarray, counts: List[int]) -> List[Optional[float]]:
+    """Score the candidate counts on a thread pool; silhouette_score releases the GIL in its pairwise reductions"""
+    with ThreadPoolExecutor(max_workers=min(len(counts), os.cpu_count() or 1),
+                            thread_name_prefix="nook-silhouette") as pool:
+        return list(pool.map(functools.partial(_silhouette_for_count, distances, dendrogram), counts))
+
+
+_kernels: Dict[str, object] = {}
+
+
+def _get_kernel(fn, signature: str):
+    """Return fn JIT-compiled with signature when numba is available, else fn itself."""
+    kernel = _kernels.get(fn.__name__)
+    if kernel is None:
+        kernel = fn
+        if _HAS_NUMBA:
+            try:
+                kernel = numba.njit(signature, cache=True, nogil=True)(fn)
+            except Exception as e:
+                logger.warning(f"numba compilation failed for {fn.__name__}, using Python: {e}")
+        _kernels[fn.__name__] = kernel
+    return kernel
+
+
 class SpeakerDiarizer:
     """
     High-quality speaker diarizer
@@ -29,7 +143,10 @@ class SpeakerDiarizer:
         min_segment_length: float = 1.0,
         clustering_method: str = "hierarchical",
         interruption_gap: float = 1.0,
-        continuous_mode: bool = True
+        continuous_mode: bool = True,
+        cache_dir: Optional[Union[str, Path]] = None,
+        release_after_call: bool = False,
+        incremental: bool = False
     ):
         """
         Initialize diarizer
@@ -40,8 +157,13 @@ class SpeakerDiarizer:
             segment_length: Segment length in seconds
             min_segment_length: Minimum segment length
             clustering_method: Clustering method
-            interruption_gap: Maximum gap in seconds to consider as interruption
+            interruption_gap: Pause in seconds that ends a speaker's run in continuous mode
+                (shorter pauses are merged); also the speaker-change gap of the fallback segmentation
             continuous_mode: Enable continuous transcription mode
+            cache_dir: Directory for embeddings/segmentations keyed by audio hash (None disables caching)
+            release_after_call: Unload models and free torch caches after every diarize() (long-running servers)
+            incremental: Assign windows to running speaker centroids (see update()) instead of
+                re-clustering everything; speaker labels persist across diarize() calls
         """
         self.threshold = threshold
         self.method = method
@@ -50,6 +172,11 @@ class SpeakerDiarizer:
         self.clustering_method = clustering_method
         self.interruption_gap = interruption_gap
         self.continuous_mode = continuous_mode
+        self.release_after_call = release_after_call
+        self.incremental = incremental
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir is not None:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
         
         # Auto-detect method
         if method == "auto":
@@ -59,6 +186,11 @@ class SpeakerDiarizer:
         self.is_initialized = False
         self.encoder = None
         self.diarization_model = None
+        # Reference voice embeddings by path: (st_mtime_ns, embedding)
+        self._reference_cache: Dict[str, Tuple[int, np.ndarray]] = {}
+        # Online clustering state (incremental mode): running mean embedding and size per speaker
+        self._centroids: Optional[np.ndarray] = None
+        self._counts: Optional[np.ndarray] = None
         
         # Clustering parameters
         self.clustering_params = {
@@ -151,14 +283,15 @@ class SpeakerDiarizer:
         """Initialize pyannote.audio"""
         try:
             import pyannote.audio
-            from pyannote.audio.pipelines.speaker_diarization import SpeakerDiarization
+            import torch
             
             # Load model (requires HuggingFace token)
             # For production need to get token at https://huggingface.co/pyannote/speaker-diarization
             model_name = "pyannote/speaker-diarization"
+            device = "cuda" if torch.cuda.is_available() else "cpu"
             
             try:
-                self.diarization_model = SpeakerDiarization.from_pretrained(model_name)
+                self.diarization_model = _get_pyannote_pipeline(model_name, device)
                 self.is_initialized = True
                 logger.info("pyannote.audio initialized")
                 return True
@@ -209,7 +342,8 @@ class SpeakerDiarizer:
         self,
         audio_file: Union[str, Path],
         transcription: Dict,
-        reference_speaker: Optional[str] = None
+        reference_speaker: Optional[str] = None,
+        reference_embedding: Optional[np.ndarray] = None
     ) -> Optional[Dict]:
         """
         Perform audio diarization
@@ -218,6 +352,7 @@ class SpeakerDiarizer:
             audio_file: Path to audio file
             transcription: Transcription result
             reference_speaker: Path to reference voice of main speaker
+            reference_embedding: Precomputed reference voice embedding (takes precedence over reference_speaker)
             
         Returns:
             Diarization result
@@ -226,6 +361,9 @@ class SpeakerDiarizer:
             if not self.initialize():
                 return None
         
+        if reference_embedding is not None:
+            reference_speaker = reference_embedding
+        
         try:
             if self.method == "pyannote":
                 return self._diarize_pyannote(audio_file, transcription, reference_speaker)
@@ -242,26 +380,41 @@ class SpeakerDiarizer:
         except Exception as e:
             logger.error(f"Diarization error: {e}")
             return None
+        
+        finally:
+            if self.release_after_call:
+                self.cleanup()
     
     def _diarize_pyannote(
         self,
         audio_file: Union[str, Path],
         transcription: Dict,
-        reference_speaker: Optional[str]
+        reference_speaker: Optional[Union[str, np.ndarray]]
     ) -> Optional[Dict]:
         """Diarization via pyannote.audio"""
         try:
-            # Perform diarization
-            diarization = self.diarization_model(str(audio_file))
-            
-            # Get segments
-            segments = []
-            for turn, _, speaker in diarization.itertracks(yield_label=True):
-                segments.append({
-                    'start': turn.start,
-                    'end': turn.end,
-                    'speaker': speaker
+            cache_key = self._cache_key(audio_file, "pyannote")
+            segments = self._cache_load_segments(cache_key)
+            if segments is None:
+                # Perform diarization on an in-memory waveform so pyannote does not decode the file again
+                import torch
+                
+                sr = 16000
+                wav = self._load_audio(audio_file, sr=sr)
+                diarization = self.diarization_model({
+                    "waveform": torch.from_numpy(np.ascontiguousarray(wav, dtype=np.float32)).unsqueeze(0),
+                    "sample_rate": sr
                 })
+                
+                # Get segments
+                segments = []
+                for turn, _, speaker in diarization.itertracks(yield_label=True):
+                    segments.append({
+                        'start': turn.start,
+                        'end': turn.end,
+                        'speaker': speaker
+                    })
+                self._cache_save_segments(cache_key, segments)
             
             # Align with transcription
             return self._align_with_transcription(segments, transcription, reference_speaker)
@@ -274,7 +427,7 @@ class SpeakerDiarizer:
         self,
         audio_file: Union[str, Path],
         transcription: Dict,
-        reference_speaker: Optional[str]
+        reference_speaker: Optional[Union[str, np.ndarray]]
     ) -> Optional[Dict]:
         """Diarization via speaker-diarization"""
         try:
@@ -301,44 +454,67 @@ class SpeakerDiarizer:
         self,
         audio_file: Union[str, Path],
         transcription: Dict,
-        reference_speaker: Optional[str]
+        reference_speaker: Optional[Union[str, np.ndarray]]
     ) -> Optional[Dict]:
         """Diarization via Resemblyzer"""
         try:
-            # Load audio
-            wav, sr = librosa.load(str(audio_file), sr=16000)
-            
-            # Preprocessing
-            from resemblyzer import preprocess_wav
-            wav = preprocess_wav(wav)
-            
-            # Create segments
-            samples_per_segment = int(self.segment_length * sr)
-            min_samples = int(self.min_segment_length * sr)
-            
+            sr = 16000
             segments = []
             embeddings = []
+            wav = None
             
-            logger.info("Extracting embeddings...")
-            logger.info(f"Audio length: {len(wav)} samples ({len(wav)/sr:.2f}s)")
-            logger.info(f"Segment length: {samples_per_segment} samples ({self.segment_length}s)")
-            logger.info(f"Min segment length: {min_samples} samples ({self.min_segment_length}s)")
-            
-            for i in range(0, len(wav), samples_per_segment):
-                segment = wav[i:i + samples_per_segment]
-                if len(segment) >= min_samples:
-                    start_time = i / sr
-                    end_time = min((i + len(segment)) / sr, len(wav) / sr)
-                    
-                    # Extract embedding
-                    embedding = self.encoder.embed_utterance(segment)
-                    embeddings.append(embedding)
-                    
+            cache_key = self._cache_key(audio_file, "resemblyzer")
+            cached = self._cache_load_embeddings(cache_key)
+            if cached is not None:
+                starts, ends, embeddings = cached
+                for start_time, end_time, embedding in zip(starts, ends, embeddings):
                     segments.append({
-                        'start': start_time,
-                        'end': end_time,
+                        'start': float(start_time),
+                        'end': float(end_time),
                         'embedding': embedding
                     })
+                logger.info(f"Loaded {len(segments)} cached embeddings")
+            else:
+                # Load audio
+                wav = self._load_audio(audio_file)
+                
+                # Preprocessing
+                from resemblyzer import preprocess_wav
+                wav = preprocess_wav(wav)
+                
+                # Create segments
+                samples_per_segment = int(self.segment_length * sr)
+                min_samples = int(self.min_segment_length * sr)
+                
+                logger.info("Extracting embeddings...")
+                logger.info(f"Audio length: {len(wav)} samples ({len(wav)/sr:.2f}s)")
+                logger.info(f"Segment length: {samples_per_segment} samples ({self.segment_length}s)")
+                logger.info(f"Min segment length: {min_samples} samples ({self.min_segment_length}s)")
+                
+                # Window boundaries first, then one batched pass through the encoder.
+                # Full windows are rows of one strided view over wav (no per-window copies).
+                windows = []
+                n_full = len(wav) // samples_per_segment
+                if n_full:
+                    full = sliding_window_view(wav, samples_per_segment)[::samples_per_segment]
+                    for k in range(n_full):
+                        i = k * samples_per_segment
+                        windows.append((i / sr, (i + samples_per_segment) / sr, full[k]))
+                tail = wav[n_full * samples_per_segment:]
+                if len(tail) and len(tail) >= min_samples:
+                    windows.append((n_full * samples_per_segment / sr, len(wav) / sr, tail))
+                
+                if windows:
+                    embeddings = self._embed_utterances([w[2] for w in windows])
+                    for (start_time, end_time, _), embedding in zip(windows, embeddings):
+                        segments.append({
+                            'start': start_time,
+                            'end': end_time,
+                            'embedding': embedding
+                        })
+                    self._cache_save_embeddings(
+                        cache_key, [w[0] for w in windows], [w[1] for w in windows], embeddings
+                    )
             
             logger.info(f"Created {len(segments)} segments")
             
@@ -346,7 +522,7 @@ class SpeakerDiarizer:
             if len(segments) == 0:
                 logger.warning("No segments created, creating single segment for entire audio")
                 # Create a single segment for the entire audio
-                embedding = self.encoder.embed_utterance(wav)
+                embedding = self._embed_utterances([wav])[0]
                 segments.append({
                     'start': 0.0,
                     'end': len(wav) / sr,
@@ -356,7 +532,10 @@ class SpeakerDiarizer:
                 return self._align_with_transcription(segments, transcription, reference_speaker)
             
             # Clustering
-            if len(embeddings) > 1:
+            if self.incremental and len(embeddings) > 0:
+                for segment, embedding in zip(segments, embeddings):
+                    segment['speaker'] = f'SPEAKER_{self.update(embedding):02d}'
+            elif len(embeddings) > 1:
                 speaker_labels = self._cluster_embeddings(embeddings)
                 
                 # Assign speaker labels
@@ -426,69 +605,295 @@ class SpeakerDiarizer:
             logger.error(f"Simple heuristic diarization error: {e}")
             return None
     
+    def _cache_key(self, audio_file: Union[str, Path], method: str) -> Optional[str]:
+        """Hash of the audio bytes plus the settings that shape the cached result; None when caching is off"""
+        if self.cache_dir is None:
+            return None
+        try:
+            h = hashlib.blake2b(digest_size=20)
+            with open(audio_file, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    h.update(block)
+            h.update(repr((method, self.segment_length, self.min_segment_length)).encode())
+            return h.hexdigest()
+        except OSError as e:
+            logger.warning(f"Diarization cache disabled for {audio_file}: {e}")
+            return None
+    
+    def _cache_load_embeddings(self, key: Optional[str]) -> Optional[Tuple[np.ndarray, np.ndarray, List[np.ndarray]]]:
+        """Cached (starts, ends, embeddings) for key, if present"""
+        if key is None:
+            return None
+        path = self.cache_dir / f"{key}.npz"
+        if not path.exists():
+            return None
+        try:
+            with np.load(path) as data:
+                return data['starts'], data['ends'], list(data['emb'].astype(np.float32, copy=False))
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable diarization cache {path}: {e}")
+            return None
+    
+    def _cache_save_embeddings(self, key: Optional[str], starts, ends, embeddings):
+        """Store window times and embeddings under key"""
+        if key is None:
+            return
+        try:
+            tmp_path = self.cache_dir / f"{key}.tmp.npz"
+            np.savez_compressed(tmp_path, starts=np.asarray(starts), ends=np.asarray(ends), emb=np.stack(embeddings))
+            os.replace(tmp_path, self.cache_dir / f"{key}.npz")
+        except Exception as e:
+            logger.warning(f"Failed to write diarization cache: {e}")
+    
+    def _cache_load_segments(self, key: Optional[str]) -> Optional[List[Dict]]:
+        """Cached speaker turns for key, if present"""
+        if key is None:
+            return None
+        path = self.cache_dir / f"{key}.json"
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable diarization cache {path}: {e}")
+            return None
+    
+    def _cache_save_segments(self, key: Optional[str], segments: List[Dict]):
+        """Store speaker turns under key"""
+        if key is None:
+            return
+        try:
+            tmp_path = self.cache_dir / f"{key}.json.tmp"
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(segments, f)
+            os.replace(tmp_path, self.cache_dir / f"{key}.json")
+        except Exception as e:
+            logger.warning(f"Failed to write diarization cache: {e}")
+    
+    def _load_audio(self, audio_file: Union[str, Path], sr: int = 16000, block_seconds: int = 30) -> np.ndarray:
+        """
+        Decode to mono float32 at sr
+        
+        soundfile decodes (downmixing block by block) and scipy's polyphase
+        resample_poly converts the rate; librosa is only imported as a fallback
+        for codecs soundfile cannot read.
+        """
+        if _HAS_SOUNDFILE:
+            try:
+                with sf.SoundFile(str(audio_file)) as f:
+                    if f.samplerate == sr and f.channels == 1:
+                        # Already in the target format (e.g. recorded chunks): one read, no resampling
+                        return f.read(dtype='float32')
+                    orig_sr = f.samplerate
+                    blocks = []
+                    for block in f.blocks(blocksize=f.samplerate * block_seconds, dtype='float32', always_2d=True):
+                        blocks.append(block.mean(axis=1) if block.shape[1] > 1 else block[:, 0].copy())
+                wav = np.concatenate(blocks) if blocks else np.zeros(0, dtype=np.float32)
+                if orig_sr != sr and len(wav):
+                    wav = self._resample(wav, orig_sr, sr)
+                return wav.astype(np.float32, copy=False)
+            except Exception as e:
+                logger.debug(f"soundfile could not read {audio_file}, using librosa: {e}")
+        import librosa
+        wav, _ = librosa.load(str(audio_file), sr=sr)
+        return wav
+    
+    @staticmethod
+    def _resample(wav: np.ndarray, orig_sr: int, sr: int) -> np.ndarray:
+        """Polyphase FIR resampling of the whole signal (librosa if scipy is missing)"""
+        try:
+            from scipy.signal import resample_poly
+        except ImportError:
+            import librosa
+            return librosa.resample(wav, orig_sr=orig_sr, target_sr=sr)
+        g = math.gcd(orig_sr, sr)
+        return resample_poly(wav, sr // g, orig_sr // g)
+    
+    def _embed_utterances(self, wavs: List[np.ndarray], max_batch: int = 256) -> List[np.ndarray]:
+        """
+        Embed several utterances with batched encoder forwards
+        
+        Same result as calling encoder.embed_utterance on each wav: every utterance
+        is cut into partial mel windows, all windows go through the network
+        together, and each utterance's partial embeddings are averaged and
+        L2-normalized. Mel spectrograms of the windows are computed on worker
+        threads (the STFT and mel projection run in NumPy outside the GIL).
+        """
+        try:
+            from resemblyzer.audio import wav_to_mel_spectrogram
+            
+            def partial_mels(wav: np.ndarray) -> List[np.ndarray]:
+                wav_slices, mel_slices = self.encoder.compute_partial_slices(len(wav))
+                max_wave_length = wav_slices[-1].stop
+                if max_wave_length >= len(wav):
+                    wav = np.pad(wav, (0, max_wave_length - len(wav)), "constant")
+                mel = wav_to_mel_spectrogram(wav)
+                return [mel[s] for s in mel_slices]
+            
+            workers = min(len(wavs), os.cpu_count() or 1)
+            if workers > 1:
+                with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="nook-mel") as pool:
+                    per_wav = list(pool.map(partial_mels, wavs))
+            else:
+                per_wav = [partial_mels(wav) for wav in wavs]
+            
+            mels = []
+            owners = []
+            for idx, wav_mels in enumerate(per_wav):
+                mels.extend(wav_mels)
+                owners.extend([idx] * len(wav_mels))
+            mels = np.asarray(mels, dtype=np.float32)
+            owners = np.asarray(owners)
+            
+            partial_embeds = np.concatenate([
+                self._embed_frames(mels[i:i + max_batch])
+                for i in range(0, len(mels), max_batch)
+            ]).astype(np.float32, copy=False)
+            
+            # Mean of each utterance's partials, then L2-normalize
+            sums = np.zeros((len(wavs), partial_embeds.shape[1]), dtype=np.float64)
+            np.add.at(sums, owners, partial_embeds)
+            raw = sums / np.bincount(owners, minlength=len(wavs))[:, None]
+            raw /= np.linalg.norm(raw, axis=1, keepdims=True)
+            return list(raw.astype(np.float32))
+            
+        except Exception as e:
+            logger.warning(f"Batched embedding failed, embedding one by one: {e}")
+            raw = np.stack([self.encoder.embed_utterance(wav) for wav in wavs]).astype(np.float32)
+            raw /= np.maximum(np.linalg.norm(raw, axis=1, keepdims=True), 1e-12)
+            return list(raw)
+    
+    def _embed_frames(self, mels: np.ndarray) -> np.ndarray:
+        """
+        One encoder forward over a batch of partial mels
+        
+        On CUDA the forward runs under autocast (bfloat16 where supported, else
+        float16); the result is returned as float32 either way.
+        """
+        device = getattr(self.encoder, "device", None)
+        if device is None or getattr(device, "type", str(device)) != "cuda":
+            return self.encoder.embed_frames_batch(mels)
+        
+        import torch
+        
+        dtype = torch.bfloat16 if torch.cuda.is_bf16_supported() else torch.float16
+        with torch.inference_mode(), torch.autocast(device_type="cuda", dtype=dtype):
+            embeds = self.encoder(torch.from_numpy(mels).to(device))
+        return embeds.float().cpu().numpy()
+    
     def _cluster_embeddings(self, embeddings: List[np.ndarray]) -> List[int]:
         """Cluster embeddings to determine speakers"""
         try:
-            from sklearn.cluster import AgglomerativeClustering
-            from sklearn.metrics.pairwise import cosine_similarity
-            
-            # Convert to numpy array
-            embeddings_array = np.array(embeddings)
+            from scipy.cluster.hierarchy import linkage
+            from scipy.spatial.distance import squareform
             
-            # Auto-detect number of clusters
-            n_speakers = self._estimate_speaker_count(embeddings_array)
+            # Convert to a contiguous float32 matrix (SGEMM for the distance matrix)
+            embeddings_array = np.ascontiguousarray(np.stack(embeddings), dtype=np.float32)
             
-            # Apply hierarchical clustering
-            clustering = AgglomerativeClustering(
-                n_clusters=n_speakers,
-                metric='precomputed',
-                linkage='average'
-            )
+            # Distance matrix, shared with the speaker-count search
+            distances = self._cosine_distances(embeddings_array)
             
-            # Calculate distance matrix
-            distances = 1 - cosine_similarity(embeddings_array)
+            # Average-linkage dendrogram, built once and cut for every candidate count
+            dendrogram = linkage(squareform(distances, checks=False), method='average')
             
-            # Cluster
-            labels = clustering.fit_predict(distances)
+            # Auto-detect number of clusters
+            n_speakers = self._estimate_speaker_count(embeddings_array, distances, dendrogram)
             
-            return labels.tolist()
+            return self._cut_dendrogram(dendrogram, n_speakers).tolist()
             
         except ImportError:
-            logger.warning("scikit-learn not installed, using simple clustering")
+            logger.warning("scipy not installed, using simple clustering")
             return self._simple_clustering(embeddings)
     
-    def _estimate_speaker_count(self, embeddings: np.ndarray) -> int:
+    def update(self, embedding: np.ndarray) -> int:
+        """
+        Online clustering step: assign one embedding to a speaker and return its index
+        
+        The embedding joins the speaker whose centroid is most cosine-similar if that
+        similarity exceeds threshold (the centroid becomes the running mean), otherwise
+        it starts a new speaker. Costs O(speakers) per call.
+        """
+        e = np.asarray(embedding, dtype=np.float32).ravel()
+        e = e / max(float(np.linalg.norm(e)), 1e-12)
+        
+        if self._centroids is not None:
+            norms = np.maximum(np.linalg.norm(self._centroids, axis=1), 1e-12)
+            sims = (self._centroids @ e) / norms
+            best = int(np.argmax(sims))
+            if sims[best] > self.threshold:
+                count = self._counts[best]
+                self._centroids[best] = (count * self._centroids[best] + e) / (count + 1)
+                self._counts[best] = count + 1
+                return best
+            self._centroids = np.vstack([self._centroids, e])
+            self._counts = np.append(self._counts, 1)
+        else:
+            self._centroids = e[None, :].copy()
+            self._counts = np.ones(1, dtype=np.int64)
+        return len(self._counts) - 1
+    
+    def reset_speakers(self):
+        """Forget the speakers accumulated by update()"""
+        self._centroids = None
+        self._counts = None
+    
+    def _cosine_distances(self, embeddings: np.ndarray) -> np.ndarray:
+        """Pairwise cosine distance matrix (one float32 GEMM over row-normalized embeddings)"""
+        unit = np.array(embeddings, dtype=np.float32, order='C')
+        unit /= np.maximum(np.linalg.norm(unit, axis=1, keepdims=True), 1e-12)
+        distances = unit @ unit.T
+        np.subtract(1.0, distances, out=distances)
+        np.fill_diagonal(distances, 0.0)
+        # Rounding can leave tiny negatives off the diagonal; metric='precomputed' rejects them
+        np.clip(distances, 0.0, 2.0, out=distances)
+        return distances
+    
+    def _cut_dendrogram(self, dendrogram: np.ndarray, n_clusters: int) -> np.ndarray:
+        """Cut a linkage matrix into n_clusters labels, numbered 0.. in order of first appearance"""
+        from scipy.cluster.hierarchy import fcluster
+        
+        raw = fcluster(dendrogram, t=n_clusters, criterion='maxclust')
+        _, first, inverse = np.unique(raw, return_index=True, return_inverse=True)
+        rank = np.empty(len(first), dtype=np.int64)
+        rank[np.argsort(first)] = np.arange(len(first))
+        return rank[inverse]
+    
+    def _estimate_speaker_count(
+        self,
+        embeddings: np.ndarray,
+        distances: Optional[np.ndarray] = None,
+        dendrogram: Optional[np.ndarray] = None
+    ) -> int:
         """Estimate number of speakers"""
         try:
-            from sklearn.cluster import AgglomerativeClustering
-            from sklearn.metrics.pairwise import cosine_similarity
-            from sklearn.metrics import silhouette_score
+            from scipy.cluster.hierarchy import linkage
+            from scipy.spatial.distance import squareform
+            
+            if distances is None:
+                distances = self._cosine_distances(embeddings)
+            if dendrogram is None:
+                dendrogram = linkage(squareform(distances, checks=False), method='average')
             
             # Try different number of clusters
             max_speakers = min(5, len(embeddings) - 1)
+            counts = list(range(2, max_speakers + 1))
             best_score = -1
             best_n = 2
             
-            for n in range(2, max_speakers + 1):
+            scores = None
+            if len(counts) > 1 and len(distances) > _PARALLEL_SILHOUETTE_MIN:
                 try:
-                    clustering = AgglomerativeClustering(
-                        n_clusters=n,
-                        metric='precomputed',
-                        linkage='average'
-                    )
-                    
-                    distances = 1 - cosine_similarity(embeddings)
-                    labels = clustering.fit_predict(distances)
-                    
-                    # Calculate silhouette score
-                    score = silhouette_score(distances, labels, metric='precomputed')
-                    
-                    if score > best_score:
-                        best_score = score
-                        best_n = n
-                        
-                except Exception:
-                    continue
+                    scores = _parallel_silhouettes(distances, dendrogram, counts)
+                except Exception as e:
+                    logger.warning(f"Parallel speaker-count search failed, scoring serially: {e}")
+            if scores is None:
+                scores = [_silhouette_for_count(distances, dendrogram, n) for n in counts]
+            
+            for n, score in zip(counts, scores):
+                if score is not None and score > best_score:
+                    best_score = score
+                    best_n = n
             
             logger.info(f"Estimated number of speakers: {best_n}")
             return best_n
@@ -498,26 +903,21 @@ class SpeakerDiarizer:
             return 2
     
     def _simple_clustering(self, embeddings: List[np.ndarray]) -> List[int]:
-        """Simple clustering without scikit-learn"""
-        labels = [0]  # First speaker
-        
-        for i in range(1, len(embeddings)):
-            # Compare with previous segment
-            similarity = np.dot(embeddings[i], embeddings[i-1])
-            
-            # If similarity is low - new speaker
-            if similarity < self.threshold:
-                labels.append(max(labels) + 1)
-            else:
-                labels.append(labels[-1])
-        
-        return labels
+        """Simple clustering without scikit-learn: new speaker when consecutive similarity drops below threshold"""
+        if len(embeddings) == 0:
+            return []
+        embeddings_array = np.ascontiguousarray(np.stack(embeddings), dtype=np.float32)
+        labels = np.empty(len(embeddings), dtype=np.int64)
+        _get_kernel(_simple_cluster_py, "void(float32[:, :], float64, int64[:])")(
+            embeddings_array, float(self.threshold), labels
+        )
+        return labels.tolist()
     
     def _align_with_transcription(
         self,
         diarization_segments: List[Dict],
         transcription: Dict,
-        reference_speaker: Optional[str]
+        reference_speaker: Optional[Union[str, np.ndarray]]
     ) -> Optional[Dict]:
         """Align diarization results with transcription"""
         try:
@@ -527,31 +927,30 @@ class SpeakerDiarizer:
                 logger.warning("No segments in transcription")
                 return None
             
-            # Load reference voice if available
+            # Reference voice: given directly, or loaded (and cached) from its file
             reference_embedding = None
-            if reference_speaker and os.path.exists(reference_speaker):
-                reference_embedding = self._load_reference_embedding(reference_speaker)
+            if isinstance(reference_speaker, np.ndarray):
+                reference_embedding = np.asarray(reference_speaker, dtype=np.float32)
+                reference_embedding = reference_embedding / max(float(np.linalg.norm(reference_embedding)), 1e-12)
+            elif reference_speaker:
+                reference_embedding = self._get_reference_embedding(reference_speaker)
             
-            # Align segments
-            aligned_segments = []
+            # Align segments: one overlap sweep for all transcription segments
+            kept = [(seg, seg['text'].strip()) for seg in whisper_segments]
+            kept = [(seg, text) for seg, text in kept if text]
+            speakers_found = self._find_speakers_for_segments(
+                [seg['start'] for seg, _ in kept],
+                [seg['end'] for seg, _ in kept],
+                diarization_segments,
+                reference_embedding
+            )
             
-            for seg in whisper_segments:
-                seg_start = seg['start']
-                seg_end = seg['end']
-                seg_text = seg['text'].strip()
-                
-                if not seg_text:
-                    continue
-                
-                # Find corresponding speaker
-                speaker = self._find_speaker_for_segment(
-                    seg_start, seg_end, diarization_segments, reference_embedding
-                )
-                
+            aligned_segments = []
+            for (seg, seg_text), speaker in zip(kept, speakers_found):
                 aligned_segments.append({
                     'speaker': speaker,
-                    'start': seg_start,
-                    'end': seg_end,
+                    'start': seg['start'],
+                    'end': seg['end'],
                     'text': seg_text,
                     'confidence': seg.get('avg_logprob', 0.0)
                 })
@@ -583,62 +982,58 @@ class SpeakerDiarizer:
             logger.error(f"Alignment error: {e}")
             return None
 
-    def _create_continuous_transcription(self, aligned_segments: List[Dict]) -> List[Dict]:
+    def _create_continuous_transcription(
+        self,
+        aligned_segments: List[Dict],
+        interruption_gap: Optional[float] = None
+    ) -> List[Dict]:
         """
         Create continuous transcription where speakers change only when interrupting each other
+        
+        Consecutive segments of one speaker are merged while the pause between them is
+        shorter than interruption_gap; a different speaker or a longer pause starts a new segment.
+        
+        Args:
+            aligned_segments: Segments aligned with transcription (regular mode)
+            interruption_gap: Override for self.interruption_gap
         """
         if not aligned_segments:
             return []
         
+        gap = self.interruption_gap if interruption_gap is None else interruption_gap
         continuous_segments = []
-        current_speaker = aligned_segments[0]['speaker']
-        current_text = []
-        current_start = aligned_segments[0]['start']
-        current_end = aligned_segments[0]['end']
-        
-        for i, segment in enumerate(aligned_segments):
-            # Check if this is a speaker interruption (different speaker with small gap)
-            is_interruption = False
-            if i > 0:
-                prev_segment = aligned_segments[i-1]
-                time_gap = segment['start'] - prev_segment['end']
-                
-                # If different speaker and small gap, consider it interruption
-                if (segment['speaker'] != prev_segment['speaker'] and 
-                    time_gap < self.interruption_gap and 
-                    segment['speaker'] != current_speaker):
-                    is_interruption = True
-            
-            # If same speaker or continuation, merge text
-            if segment['speaker'] == current_speaker and not is_interruption:
+        current_speaker = None
+        current_text: List[str] = []
+        current_start = current_end = 0.0
+        
+        for segment in aligned_segments:
+            speaker = segment['speaker']
+            if current_text and speaker == current_speaker and segment['start'] - current_end < gap:
                 current_text.append(segment['text'])
                 current_end = segment['end']
-            else:
-                # Save current segment if we have text
-                if current_text:
-                    continuous_segments.append({
-                        'speaker': current_speaker,
-                        'start': current_start,
-                        'end': current_end,
-                        'text': ' '.join(current_text).strip(),
-                        'confidence': 0.0  # Average confidence would be better
-                    })
-                
-                # Start new segment
-                current_speaker = segment['speaker']
-                current_text = [segment['text']]
-                current_start = segment['start']
-                current_end = segment['end']
+                continue
+            
+            if current_text:
+                continuous_segments.append({
+                    'speaker': current_speaker,
+                    'start': current_start,
+                    'end': current_end,
+                    'text': ' '.join(current_text).strip(),
+                    'confidence': 0.0  # Average confidence would be better
+                })
+            current_speaker = speaker
+            current_text = [segment['text']]
+            current_start = segment['start']
+            current_end = segment['end']
         
         # Add final segment
-        if current_text:
-            continuous_segments.append({
-                'speaker': current_speaker,
-                'start': current_start,
-                'end': current_end,
-                'text': ' '.join(current_text).strip(),
-                'confidence': 0.0
-            })
+        continuous_segments.append({
+            'speaker': current_speaker,
+            'start': current_start,
+            'end': current_end,
+            'text': ' '.join(current_text).strip(),
+            'confidence': 0.0
+        })
         
         return continuous_segments
     
@@ -650,29 +1045,74 @@ class SpeakerDiarizer:
         reference_embedding: Optional[np.ndarray]
     ) -> str:
         """Find speaker for transcription segment"""
-        speaker = 'UNKNOWN'
-        max_overlap = 0
-        
-        for diar_seg in diarization_segments:
-            # Calculate time overlap
-            overlap_start = max(seg_start, diar_seg['start'])
-            overlap_end = min(seg_end, diar_seg['end'])
-            
-            if overlap_end > overlap_start:
-                overlap = overlap_end - overlap_start
-                if overlap > max_overlap:
-                    max_overlap = overlap
-                    speaker = diar_seg['speaker']
-                    
-                    # If reference voice exists, check similarity
-                    if reference_embedding is not None and 'embedding' in diar_seg:
-                        similarity = np.dot(diar_seg['embedding'], reference_embedding)
-                        if similarity > self.threshold:
-                            speaker = 'USER'
-                        else:
-                            speaker = 'OTHER'
-        
-        return speaker
+        return self._find_speakers_for_segments(
+            [seg_start], [seg_end], diarization_segments, reference_embedding
+        )[0]
+    
+    def _find_speakers_for_segments(
+        self,
+        seg_starts: List[float],
+        seg_ends: List[float],
+        diarization_segments: List[Dict],
+        reference_embedding: Optional[np.ndarray]
+    ) -> List[str]:
+        """Speaker of the most-overlapping diarization turn for each transcription segment"""
+        if not seg_starts:
+            return []
+        if not diarization_segments:
+            return ['UNKNOWN'] * len(seg_starts)
+        
+        # Sort turns by start once (stable, so equal starts keep their order)
+        order = sorted(range(len(diarization_segments)), key=lambda k: diarization_segments[k]['start'])
+        diar_starts = np.array([diarization_segments[k]['start'] for k in order], dtype=np.float64)
+        diar_ends = np.array([diarization_segments[k]['end'] for k in order], dtype=np.float64)
+        seg_starts = np.asarray(seg_starts, dtype=np.float64)
+        seg_ends = np.asarray(seg_ends, dtype=np.float64)
+        best = np.empty(len(seg_starts), dtype=np.int64)
+        kernel = _get_kernel(
+            _best_overlap_py,
+            "void(float64[:], float64[:], float64[:], float64[:], float64[:], int64[:])"
+        )
+        if kernel is _best_overlap_py:
+            # No JIT: the interpreted sweep is slower than NumPy on the overlap matrix
+            _best_overlap_np(seg_starts, seg_ends, diar_starts, diar_ends, best)
+        else:
+            kernel(seg_starts, seg_ends, diar_starts, diar_ends, np.maximum.accumulate(diar_ends), best)
+        
+        # If reference voice exists, similarity of every matched turn in one matrix-vector product
+        similarities = {}
+        if reference_embedding is not None:
+            matched = [j for j in dict.fromkeys(best.tolist())
+                       if j >= 0 and 'embedding' in diarization_segments[order[j]]]
+            if matched:
+                turn_embeddings = np.stack([diarization_segments[order[j]]['embedding'] for j in matched])
+                similarities = dict(zip(matched, (turn_embeddings @ reference_embedding).tolist()))
+        
+        speakers = []
+        for j in best.tolist():
+            if j < 0:
+                speakers.append('UNKNOWN')
+            elif j in similarities:
+                speakers.append('USER' if similarities[j] > self.threshold else 'OTHER')
+            else:
+                speakers.append(diarization_segments[order[j]]['speaker'])
+        return speakers
+    
+    def _get_reference_embedding(self, reference_file: str) -> Optional[np.ndarray]:
+        """Reference voice embedding, recomputed only when the file changes"""
+        try:
+            mtime_ns = os.stat(reference_file).st_mtime_ns
+        except OSError:
+            return None
+        
+        cached = self._reference_cache.get(reference_file)
+        if cached is not None and cached[0] == mtime_ns:
+            return cached[1]
+        
+        embedding = self._load_reference_embedding(reference_file)
+        if embedding is not None:
+            self._reference_cache[reference_file] = (mtime_ns, embedding)
+        return embedding
     
     def _load_reference_embedding(self, reference_file: str) -> Optional[np.ndarray]:
         """Load reference voice embedding"""
@@ -681,14 +1121,15 @@ class SpeakerDiarizer:
                 return None
             
             # Load audio
-            wav, sr = librosa.load(reference_file, sr=16000)
+            wav = self._load_audio(reference_file)
             
             # Preprocessing
             from resemblyzer import preprocess_wav
             wav = preprocess_wav(wav)
             
-            # Extract embedding
-            embedding = self.encoder.embed_utterance(wav)
+            # Extract embedding, unit-normalized so turn similarities are plain dot products
+            embedding = np.asarray(self.encoder.embed_utterance(wav), dtype=np.float32)
+            embedding /= max(float(np.linalg.norm(embedding)), 1e-12)
             
             logger.info(f"Reference voice loaded: {reference_file}")
             return embedding
@@ -709,13 +1150,27 @@ class SpeakerDiarizer:
     
     def cleanup(self):
         """Clean up resources"""
-        if self.encoder:
+        if self.encoder is not None:
             del self.encoder
             self.encoder = None
+        self._reference_cache.clear()
         
-        if self.diarization_model:
+        if self.diarization_model is not None:
             del self.diarization_model
             self.diarization_model = None
+            # Drop the shared pipeline too; other diarizers keep their own references
+            _get_pyannote_pipeline.cache_clear()
+        
+        # Return freed model memory now instead of at the next allocation
+        import gc
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+                torch.cuda.ipc_collect()
+        except Exception:
+            pass
         
         self.is_initialized = False
         logger.info("Diarizer resources cleaned up")
@@ -4,20 +4,320 @@ Provides easy integration with Swift/SwiftUI applications
 """
 
 import os
-import json
+import ctypes
+import errno
+import itertools
+import shutil
+import struct
 import time
 import threading
-from typing import Dict, List, Optional, Callable, Union
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Callable, Tuple, Union
 from pathlib import Path
 import logging
 
 from .simple_api import SimpleNookEngine
+from .audio_processor import _dumps, _loads
+
+try:
+    from watchdog.observers import Observer  # FSEvents on macOS, inotify on Linux
+    _HAS_WATCHDOG = True
+except Exception:
+    _HAS_WATCHDOG = False
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
+class _WatchHandler:
+    """watchdog handler that sets an event when one of the target files changes"""
+    
+    def __init__(self, targets: set, event: threading.Event):
+        self.targets = targets
+        self.event = event
+    
+    def dispatch(self, fs_event):
+        if fs_event.is_directory:
+            return
+        # dest_path covers files written elsewhere and renamed into place
+        for path in (getattr(fs_event, "src_path", None), getattr(fs_event, "dest_path", None)):
+            if path and os.path.realpath(path) in self.targets:
+                self.event.set()
+                return
+
+
+class _FileWatcher:
+    """
+    Blocks a worker thread until one of the given files is created, modified or moved into place
+    
+    Uses kernel notifications through watchdog when available, waking at most once a
+    second to cover missed events; otherwise wait() degrades to the old fixed poll.
+    """
+    
+    def __init__(self, paths: List[str]):
+        self._event = threading.Event()
+        self._observer = None
+        if not _HAS_WATCHDOG:
+            return
+        targets = {os.path.realpath(p) for p in paths}
+        try:
+            observer = Observer()
+            handler = _WatchHandler(targets, self._event)
+            for folder in {os.path.dirname(p) for p in targets}:
+                observer.schedule(handler, folder, recursive=False)
+            observer.daemon = True
+            observer.start()
+            self._observer = observer
+        except Exception as e:
+            logger.warning(f"File notifications unavailable, polling instead: {e}")
+    
+    def wait(self, poll_interval: float = 0.1) -> bool:
+        """Wait for a change (or the fallback timeout); True if a change was signalled"""
+        fired = self._event.wait(1.0 if self._observer is not None else poll_interval)
+        self._event.clear()
+        return fired
+    
+    def wake(self):
+        """Release a waiting thread, e.g. so it can notice shutdown"""
+        self._event.set()
+    
+    def stop(self):
+        if self._observer is not None:
+            try:
+                self._observer.stop()
+                self._observer.join(timeout=1.0)
+            except Exception:
+                pass
+            self._observer = None
+        self.wake()
+
+
+# Quiet period after a status.json write during which further updates are coalesced
+_STATUS_DEBOUNCE_S = 0.05
+
+
+def _write_all(fd: int, data: bytes):
+    """os.write until every byte is written"""
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+# Cleared after the first failure: macOS sendfile only writes to sockets, and some
+# filesystems reject it, so later copies go straight to pread/write
+_sendfile_ok = hasattr(os, "sendfile")
+
+
+def _copy_range(src_fd: int, dst_fd: int, offset: int, count: int):
+    """Copy count bytes at offset in src_fd to dst_fd's position, in-kernel via sendfile where supported"""
+    global _sendfile_ok
+    if _sendfile_ok:
+        try:
+            while count > 0:
+                sent = os.sendfile(dst_fd, src_fd, offset, count)
+                if sent == 0:
+                    return  # source shrank under us; the tail reader restarts on its next read
+                offset += sent
+                count -= sent
+            return
+        except OSError as e:
+            if e.errno not in (errno.EINVAL, errno.ENOSYS, errno.ENOTSOCK, errno.EOPNOTSUPP):
+                raise
+            _sendfile_ok = False
+    if count > 0:
+        _write_all(dst_fd, os.pread(src_fd, count, offset))
+
+
+class _TailReader:
+    """
+    Returns the complete lines appended to a file since the previous read
+    
+    The descriptor stays open between reads and new bytes come from one os.pread, so a
+    tick costs a stat plus a read instead of open/seek/read/close. The file is reopened
+    if it is replaced (new inode); `restarted` is set when an already-followed file was
+    truncated or replaced, and reading resumes from its start.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.fd = None
+        self.inode = None
+        self.offset = 0
+        self.restarted = False
+    
+    def _sync(self) -> Optional[int]:
+        """Current file size, (re)opening or rewinding as needed; None while the file does not exist"""
+        self.restarted = False
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        if self.fd is None or st.st_ino != self.inode:
+            self.restarted = self.fd is not None
+            self.close()
+            self.fd = os.open(self.path, os.O_RDONLY)
+            self.inode = os.fstat(self.fd).st_ino
+        if st.st_size < self.offset:
+            self.offset = 0
+            self.restarted = True
+        return st.st_size
+    
+    def read(self) -> Optional[bytes]:
+        """New complete lines (b"" if none yet), or None while the file does not exist"""
+        size = self._sync()
+        if size is None:
+            return None
+        if size == self.offset:
+            return b""
+        chunk = os.pread(self.fd, size - self.offset, self.offset)
+        complete = chunk.rfind(b"\n") + 1
+        self.offset += complete
+        return chunk[:complete]
+    
+    def read_range(self, window: int = 4096) -> Optional[Tuple[int, int]]:
+        """Like read(), but returns the (start, end) byte range of the new complete lines
+        instead of their bytes; only the last `window` bytes are read to find the line boundary"""
+        size = self._sync()
+        if size is None:
+            return None
+        start = end = self.offset
+        hi = size
+        while hi > start:
+            lo = max(start, hi - window)
+            newline = os.pread(self.fd, hi - lo, lo).rfind(b"\n")
+            if newline >= 0:
+                end = lo + newline + 1
+                break
+            hi = lo
+        self.offset = end
+        return start, end
+    
+    def close(self):
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.offset = 0
+
+
+def _write_atomic(path: str, data: bytes, fsync: bool = False):
+    """
+    Write data to path via a temp file and os.replace, so readers never see a partial file
+    
+    fsync makes the new contents durable before the rename (skipped on mobile to spare flash).
+    """
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        _write_all(fd, data)
+        if fsync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    os.replace(tmp_path, path)
+
+
+_RING_HEADER = 64  # head and tail counters, padded to a cache line
+_RING_WRAP = 0xFFFFFFFF
+_ring_ids = itertools.count()
+
+
+class _EventRing:
+    """Single-producer/single-consumer ring of JSON event records in POSIX shared memory.
+
+    Layout: [head:uint64][tail:uint64] padded to 64 bytes, then records of
+    [length:uint32][payload] aligned to 8 bytes. head and tail are running byte
+    offsets (position = offset % capacity); the reader owns head, the engine only
+    advances tail, and only after the record bytes are in place and a lock
+    round-trip has fenced them. A length of 0xFFFFFFFF tells the reader to skip
+    to the start of the data area; readers should load tail with acquire semantics.
+    
+    Each ring gets its own segment name (published as `name`); an existing segment
+    is never reused or unlinked, creation fails with FileExistsError instead.
+    """
+    
+    def __init__(self, size: int = 1 << 20):
+        name = f"nook_{os.getpid()}_{next(_ring_ids)}"
+        self._shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self.name = name
+        self.dropped = 0
+        self._capacity = (size - _RING_HEADER) & ~7
+        self._buf = self._shm.buf
+        # Aligned 8-byte counters, so each load/store is a single machine access
+        self._head = ctypes.c_uint64.from_buffer(self._buf, 0)
+        self._tail = ctypes.c_uint64.from_buffer(self._buf, 8)
+        self._head.value = 0
+        self._tail.value = 0
+        self._lock = threading.Lock()  # engine threads share the single producer slot
+        # Acquiring/releasing a mutex is a full memory barrier, so cycling this one
+        # orders the payload stores before the tail store (ARM64 would otherwise reorder them)
+        self._fence = threading.Lock()
+    
+    def push(self, payload: bytes) -> bool:
+        """Append one record; drops it and returns False when the reader is too far behind"""
+        need = (4 + len(payload) + 7) & ~7
+        with self._lock:
+            if self._shm is None:
+                return False
+            tail = self._tail.value
+            pos = tail % self._capacity
+            skip = self._capacity - pos if pos + need > self._capacity else 0
+            if need + skip > self._capacity - (tail - self._head.value):
+                self.dropped += 1
+                return False
+            if skip:
+                struct.pack_into('<I', self._buf, _RING_HEADER + pos, _RING_WRAP)
+                pos = 0
+            start = _RING_HEADER + pos
+            struct.pack_into('<I', self._buf, start, len(payload))
+            self._buf[start + 4:start + 4 + len(payload)] = payload
+            with self._fence:
+                pass
+            self._tail.value = tail + skip + need
+            return True
+    
+    def close(self):
+        """Release and unlink the segment"""
+        with self._lock:
+            if self._shm is None:
+                return
+            # ctypes views keep the buffer exported; drop them before closing
+            del self._head, self._tail
+            self._buf = None
+            shm, self._shm = self._shm, None
+        shm.close()
+        try:
+            shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def _read_last_record(path: str, window: int = 4096) -> Optional[bytes]:
+    """
+    Last complete (newline-terminated, non-blank) line of a JSONL file, reading backwards from the end
+    
+    Only the final `window` bytes are read, doubling while the record starts before them.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        while True:
+            offset = max(0, size - window)
+            f.seek(offset)
+            tail = f.read(size - offset)
+            end = tail.rfind(b"\n")
+            while end >= 0:
+                start = tail.rfind(b"\n", 0, end) + 1
+                if start == 0 and offset > 0:
+                    break  # the record may begin before the window
+                record = tail[start:end].strip()
+                if record:
+                    return record
+                end = start - 1
+            if offset == 0:
+                return None
+            window *= 2
+
+
 class IOSIntegrationEngine:
     """
     iOS/macOS Integration Engine
@@ -36,7 +336,8 @@ class IOSIntegrationEngine:
         optimize_for_mobile: bool = True,
         temp_dir: str = "/tmp/nook_engine",
         continuous_mode: bool = True,
-        interruption_gap: float = 1.0
+        interruption_gap: float = 1.0,
+        use_shm: bool = False
     ):
         """
         Initialize iOS Integration Engine
@@ -46,13 +347,17 @@ class IOSIntegrationEngine:
             optimize_for_mobile: Enable mobile optimizations
             temp_dir: Temporary directory for communication
             continuous_mode: Enable continuous transcription mode
-            interruption_gap: Gap threshold for interruption detection (seconds)
+            interruption_gap: Pause in seconds that ends a speaker's run in continuous mode
+            use_shm: Publish status/result/segment events to a shared-memory ring
+                (named in status.json's "event_ring") instead of status.jsonl
         """
         self.model_size = model_size
         self.optimize_for_mobile = optimize_for_mobile
         self.continuous_mode = continuous_mode
         self.interruption_gap = interruption_gap
         self.temp_dir = temp_dir
+        # fsync status/result files before publishing them (off on mobile to save flash wear and battery)
+        self.durable_writes = not optimize_for_mobile
         self.work_dir = os.getcwd()
         self.chunks_dir = os.path.join(self.work_dir, "audio_chunks")
         self.transcripts_dir = os.path.join(self.work_dir, "transcripts")
@@ -78,15 +383,62 @@ class IOSIntegrationEngine:
         self.command_file = os.path.join(temp_dir, "command.json")
         self.result_file = os.path.join(temp_dir, "result.json")
         self.stream_file = os.path.join(temp_dir, "stream.jsonl")
+        # Append-only status/result events, so clients can tail one file
+        # instead of re-reading status.json and result.json per command
+        self.events_file = os.path.join(temp_dir, "status.jsonl")
+        self._current_request_id = None
+        
+        # status.json coalescing: bursts within _STATUS_DEBOUNCE_S collapse into one trailing write,
+        # and a status equal to the last one written (ignoring its timestamp) is not written at all
+        self._status_lock = threading.Lock()
+        self._status_timer = None
+        self._status_dirty = False
+        self._last_status = None
+        
+        # Optional shared-memory event channel; status.json, result.json and
+        # stream.jsonl are still written for clients that poll files
+        self._event_ring = None
+        if use_shm:
+            try:
+                self._event_ring = _EventRing()
+            except Exception as e:
+                logger.warning(f"Shared-memory event ring unavailable, using {self.events_file}: {e}")
+        
+        # Fields that never change after init are encoded once; status.json is this
+        # prefix (without its closing brace) plus the per-write dynamic fields
+        self._status_static = _dumps({
+            "model_size": self.model_size,
+            "optimize_for_mobile": self.optimize_for_mobile,
+            "continuous_mode": self.continuous_mode,
+            "interruption_gap": self.interruption_gap,
+            **({"event_ring": self._event_ring.name} if self._event_ring is not None else {})
+        })[:-1]
+        self._ios_integration_info = {
+            "temp_dir": self.temp_dir,
+            "status_file": self.status_file,
+            "command_file": self.command_file,
+            "result_file": self.result_file,
+            "stream_file": self.stream_file,
+            "events_file": self.events_file
+        }
+        if self._event_ring is not None:
+            self._ios_integration_info["event_ring"] = self._event_ring.name
+        
+        # Start a fresh event log for this engine instance
+        open(self.events_file, 'w').close()
         
         # Background thread
         self.command_monitor_thread = None
         self.should_monitor = False
+        self._command_watcher = None
+        self._stream_watcher = None
         
-        # Ensure folders exist and are clean on startup
+        # Ensure folders exist and are clean on startup (purging runs in the background)
+        self._purge_lock = threading.Lock()
+        self._purge_thread = None
         os.makedirs(self.chunks_dir, exist_ok=True)
         os.makedirs(self.transcripts_dir, exist_ok=True)
-        self._purge_old_artifacts(remove_all=True)
+        self._purge_in_background()
     
     def initialize(self) -> bool:
         """Initialize the engine"""
@@ -99,7 +451,7 @@ class IOSIntegrationEngine:
                 self._update_status()
                 self._start_command_monitor()
                 # Clean any stale files from previous runs
-                self._purge_old_artifacts(remove_all=True)
+                self._purge_in_background()
                 logger.info("✅ iOS Integration Engine initialized")
                 return True
             else:
@@ -111,47 +463,94 @@ class IOSIntegrationEngine:
             return False
     
     def _update_status(self):
-        """Update status file for iOS app to read"""
+        """Update status file for iOS app to read (coalesced, see _STATUS_DEBOUNCE_S)"""
+        with self._status_lock:
+            if self._status_timer is not None:
+                # A write just happened; the timer writes the latest state when the burst ends
+                self._status_dirty = True
+                return
+            self._write_status()
+            self._status_timer = threading.Timer(_STATUS_DEBOUNCE_S, self._flush_status)
+            self._status_timer.daemon = True
+            self._status_timer.start()
+    
+    def _flush_status(self):
+        """Debounce timer: write the status once more if it was updated during the quiet period"""
+        with self._status_lock:
+            self._status_timer = None
+            if self._status_dirty:
+                self._status_dirty = False
+                self._write_status()
+    
+    def _write_status(self):
+        """Write status.json and its event, unless nothing but the timestamp changed"""
         try:
-            status = {
-                "is_initialized": self.is_initialized,
-                "is_listening": self.is_listening,
-                "model_size": self.model_size,
-                "optimize_for_mobile": self.optimize_for_mobile,
-                "continuous_mode": self.continuous_mode,
-                "interruption_gap": self.interruption_gap,
-                "timestamp": time.time(),
-                "session_active": self.current_session is not None
-            }
+            state = (self.is_initialized, self.is_listening, self.current_session is not None)
+            if state == self._last_status:
+                return
+            content = self._status_static + b"," + _dumps({
+                "is_initialized": state[0],
+                "is_listening": state[1],
+                "session_active": state[2],
+                "timestamp": time.time()
+            })[1:]
             
-            with open(self.status_file, 'w') as f:
-                json.dump(status, f, indent=2)
+            _write_atomic(self.status_file, content, self.durable_writes)
+            # Recorded only once written, so a failed write is retried on the next update
+            self._last_status = state
+            
+            self._append_line(b'{"event":"status",' + content[1:])
                 
         except Exception as e:
             logger.error(f"Status update error: {e}")
     
+    def _append_event(self, event: Dict):
+        """Append event line to status.jsonl for subscribed clients"""
+        self._append_line(_dumps(event))
+    
+    def _append_line(self, line: bytes):
+        """Append an already-encoded event line to the event ring, or to status.jsonl
+        when the ring is off or the record does not fit"""
+        if self._event_ring is not None:
+            if self._event_ring.push(line):
+                return
+            logger.warning(f"Event ring full or record too large ({len(line)} bytes), appending to {self.events_file}")
+        try:
+            with open(self.events_file, 'ab') as f:
+                f.write(line + b"\n")
+        except Exception as e:
+            logger.error(f"Event append error: {e}")
+    
     def _start_command_monitor(self):
         """Start monitoring for commands from iOS app"""
         self.should_monitor = True
+        if self._command_watcher is None:
+            self._command_watcher = _FileWatcher([self.command_file])
         self.command_monitor_thread = threading.Thread(target=self._monitor_commands, daemon=True)
         self.command_monitor_thread.start()
     
     def _monitor_commands(self):
         """Monitor command file for iOS app commands"""
+        watcher = self._command_watcher
         while self.should_monitor:
             try:
-                if os.path.exists(self.command_file):
+                try:
                     # Read command
-                    with open(self.command_file, 'r') as f:
-                        command = json.load(f)
+                    with open(self.command_file, 'rb') as f:
+                        command = _loads(f.read())
+                except FileNotFoundError:
+                    command = None
+                
+                if command is not None:
+                    # Remove command file before processing so a command
+                    # written meanwhile is not deleted unprocessed
+                    os.remove(self.command_file)
                     
                     # Process command
                     self._process_command(command)
-                    
-                    # Remove command file
-                    os.remove(self.command_file)
                 
-                time.sleep(0.1)  # Check every 100ms
+                # Sleep until command.json changes (100ms poll without watchdog)
+                watcher.wait(0.1)
                 
             except Exception as e:
                 logger.error(f"Command monitoring error: {e}")
@@ -161,6 +560,8 @@ class IOSIntegrationEngine:
         """Process command from iOS app"""
         try:
             cmd_type = command.get("type")
+            # Echoed in results so clients can correlate replies
+            self._current_request_id = command.get("request_id")
             
             if cmd_type == "start_listening":
                 self._handle_start_listening(command)
@@ -230,6 +631,7 @@ class IOSIntegrationEngine:
             results = self.engine.stop_listening()
             self.is_listening = False
             self.current_session = None
+            self._stop_stream_watcher()
             
             self._update_status()
             self._send_result({
@@ -276,15 +678,7 @@ class IOSIntegrationEngine:
         """Handle status request command"""
         try:
             status = self.engine.get_status()
-            status.update({
-                "ios_integration": {
-                    "temp_dir": self.temp_dir,
-                    "status_file": self.status_file,
-                    "command_file": self.command_file,
-                    "result_file": self.result_file,
-                    "stream_file": self.stream_file
-                }
-            })
+            status["ios_integration"] = dict(self._ios_integration_info)
             
             self._send_result({
                 "message": "Status retrieved",
@@ -324,90 +718,169 @@ class IOSIntegrationEngine:
         
         If low-latency mode is active, mirror ``<output>.stream`` to ``self.stream_file``.
         If low-latency stream is unavailable (fallback mode), synthesize lightweight
-        JSONL updates from aggregated ``<output>.json`` so that the app UI can still
-        display progressive text.
+        JSONL updates so that the app UI can still display progressive text: new
+        segments are tailed from the ``<output>.delta.jsonl`` sidecar, and the
+        aggregated ``<output>.json`` is only parsed after the producer snapshots it
+        and truncates the sidecar (or when there is no sidecar).
         """
+        stream_file = f"{self.current_session['output_file']}.stream"
+        agg_file = self.current_session['output_file']
+        delta_file = f"{agg_file}.delta.jsonl"
+        self._stop_stream_watcher()
+        watcher = _FileWatcher([stream_file, agg_file, delta_file])
+        self._stream_watcher = watcher
+        
+        def emit(segment: Dict, segment_id: int):
+            payload = {
+                "id": segment_id,
+                "start": segment.get("start", 0.0),
+                "end": segment.get("end", 0.0),
+                "text": segment.get("text", ""),
+                "speaker": segment.get("speaker", "UNKNOWN"),
+                "is_final": True
+            }
+            line = _dumps(payload)
+            with open(self.stream_file, 'ab') as f:
+                f.write(line + b"\n")
+            self._publish_segments(line)
+        
         def monitor_stream():
-            stream_file = f"{self.current_session['output_file']}.stream"
-            agg_file = self.current_session['output_file']
+            # Segments emitted so far in fallback mode
             last_emitted_len = 0
+            # Low-latency stream and fallback delta sidecar, each followed through one open descriptor
+            stream_tail = _TailReader(stream_file)
+            delta_tail = _TailReader(delta_file)
+            # Mirror descriptor; (re)opened with truncation on the first copy of each stream
+            mirror_fd = None
+            # (mtime_ns, size) of the aggregate when it was last parsed
+            agg_stat = None
             
-            while self.is_listening:
-                try:
-                    if os.path.exists(stream_file):
-                        # Read latest updates from low-latency stream
-                        with open(stream_file, 'r') as f:
-                            lines = f.readlines()
-                        if lines:
-                            with open(self.stream_file, 'w') as f:
-                                f.writelines(lines)
-                    else:
-                        # Fallback: synthesize JSONL from aggregated JSON
-                        if os.path.exists(agg_file):
-                            try:
-                                with open(agg_file, 'r') as f:
-                                    data = json.load(f)
-                                segments = data.get('segments', [])
-                                if len(segments) > 0:
-                                    # Emit only when new segment appears
-                                    if len(segments) != last_emitted_len:
-                                        last = segments[-1]
-                                        payload = {
-                                            "id": len(segments) - 1,
-                                            "start": last.get("start", 0.0),
-                                            "end": last.get("end", 0.0),
-                                            "text": last.get("text", ""),
-                                            "speaker": last.get("speaker", "UNKNOWN"),
-                                            "is_final": True
-                                        }
-                                        with open(self.stream_file, 'a') as f:
-                                            f.write(json.dumps(payload, ensure_ascii=False) + "\n")
-                                        last_emitted_len = len(segments)
-                            except Exception as ie:
-                                logger.debug(f"Fallback stream synth error: {ie}")
-                    
-                    time.sleep(0.1)  # Faster mirror
-                except Exception as e:
-                    logger.error(f"Stream monitoring error: {e}")
-                    break
+            try:
+                while self.is_listening:
+                    try:
+                        span = stream_tail.read_range()
+                        
+                        if span is not None:
+                            # Mirror what was appended since last tick (complete lines only)
+                            if stream_tail.restarted and mirror_fd is not None:
+                                os.close(mirror_fd)
+                                mirror_fd = None
+                            start, end = span
+                            if end > start:
+                                if mirror_fd is None:
+                                    # The first copy replaces a mirror left from an earlier session
+                                    mirror_fd = os.open(self.stream_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+                                _copy_range(stream_tail.fd, mirror_fd, start, end - start)
+                                if self._event_ring is not None:
+                                    self._publish_segments(os.pread(stream_tail.fd, end - start, start))
+                        else:
+                            # Fallback: synthesize JSONL from the chunked recorder's output
+                            delta = delta_tail.read()
+                            
+                            if delta is None or delta_tail.restarted:
+                                # No sidecar, or it was truncated after a snapshot: the aggregate
+                                # (written before the truncation) holds anything not yet emitted
+                                try:
+                                    st = os.stat(agg_file)
+                                    current_stat = (st.st_mtime_ns, st.st_size)
+                                except OSError:
+                                    current_stat = None
+                                if current_stat is not None and current_stat != agg_stat:
+                                    try:
+                                        with open(agg_file, 'rb') as f:
+                                            segments = _loads(f.read()).get('segments', [])
+                                        agg_stat = current_stat
+                                        # Emit every segment not sent yet, in order
+                                        for segment_id in range(last_emitted_len, len(segments)):
+                                            emit(segments[segment_id], segment_id)
+                                        last_emitted_len = max(last_emitted_len, len(segments))
+                                    except Exception as ie:
+                                        logger.debug(f"Fallback stream synth error: {ie}")
+                            
+                            # Tail new segments: one JSON object per complete line
+                            for line in (delta or b"").splitlines():
+                                if not line.strip():
+                                    continue
+                                try:
+                                    segment = _loads(line)
+                                except Exception as ie:
+                                    logger.debug(f"Fallback stream synth error: {ie}")
+                                    continue
+                                emit(segment, last_emitted_len)
+                                last_emitted_len += 1
+                        
+                        watcher.wait(0.1)  # Wake on writes to the stream/aggregate (100ms poll without watchdog)
+                    except Exception as e:
+                        logger.error(f"Stream monitoring error: {e}")
+                        break
+            finally:
+                stream_tail.close()
+                delta_tail.close()
+                if mirror_fd is not None:
+                    os.close(mirror_fd)
+                watcher.stop()
         
         thread = threading.Thread(target=monitor_stream, daemon=True)
         thread.start()
+    
+    def _publish_segments(self, lines: bytes):
+        """Push stream.jsonl lines to the event ring as "segment" events (status.jsonl if they do not fit)"""
+        if self._event_ring is None:
+            return
+        for line in lines.splitlines():
+            if line.startswith(b"{") and len(line) > 2:
+                self._append_line(b'{"event":"segment",' + line[1:])
+    
+    def _stop_stream_watcher(self):
+        """Stop the current stream watcher so its monitor thread exits promptly"""
+        if self._stream_watcher is not None:
+            self._stream_watcher.stop()
+            self._stream_watcher = None
 
-    def _purge_old_artifacts(self, max_age_seconds: int = 3600, remove_all: bool = False):
+    def _purge_in_background(self) -> threading.Thread:
+        """Purge everything left from earlier runs on a daemon thread, so startup does not wait on it.
+        Only files older than this call are removed, so a session that starts meanwhile keeps its files.
+        """
+        thread = threading.Thread(
+            target=self._purge_old_artifacts,
+            kwargs={"remove_all": True, "before": time.time()},
+            name="nook-purge",
+            daemon=True
+        )
+        self._purge_thread = thread
+        thread.start()
+        return thread
+    
+    def _purge_old_artifacts(self, max_age_seconds: int = 3600, remove_all: bool = False,
+                             before: Optional[float] = None):
         """Remove old audio chunks, transcripts and temporary files.
-        If remove_all=True, remove everything regardless of age.
+        If remove_all=True, remove everything regardless of age (modified before `before`, if given).
         """
+        with self._purge_lock:
+            self._purge_files(max_age_seconds, remove_all, before)
+    
+    def _purge_files(self, max_age_seconds: int, remove_all: bool, before: Optional[float]):
         now = time.time()
+        if remove_all:
+            cutoff = before if before is not None else float("inf")
+        else:
+            cutoff = now - max_age_seconds
         for folder in [self.chunks_dir, self.transcripts_dir]:
             try:
-                if not os.path.exists(folder):
-                    continue
-                for name in os.listdir(folder):
-                    path = os.path.join(folder, name)
-                    try:
-                        if remove_all or (now - os.path.getmtime(path) > max_age_seconds):
-                            if os.path.isfile(path):
-                                os.remove(path)
+                # scandir entries carry the type and stat from the directory read
+                with os.scandir(folder) as it:
+                    for entry in it:
+                        try:
+                            if entry.stat(follow_symlinks=False).st_mtime >= cutoff:
+                                continue
+                            if entry.is_dir(follow_symlinks=False):
+                                shutil.rmtree(entry.path, ignore_errors=True)
                             else:
-                                # remove empty subfolders if any
-                                for root, dirs, files in os.walk(path, topdown=False):
-                                    for f in files:
-                                        try:
-                                            os.remove(os.path.join(root, f))
-                                        except Exception:
-                                            pass
-                                    for d in dirs:
-                                        try:
-                                            os.rmdir(os.path.join(root, d))
-                                        except Exception:
-                                            pass
-                                try:
-                                    os.rmdir(path)
-                                except Exception:
-                                    pass
-                    except Exception as ie:
-                        logger.debug(f"Purge skip {path}: {ie}")
+                                os.remove(entry.path)
+                        except Exception as ie:
+                            logger.debug(f"Purge skip {entry.path}: {ie}")
+            except FileNotFoundError:
+                continue
             except Exception as e:
                 logger.debug(f"Purge folder error {folder}: {e}")
         
@@ -415,7 +888,7 @@ class IOSIntegrationEngine:
         for name in ["live_transcription.json", "live_transcription.json.stream"]:
             p = os.path.join(self.work_dir, name)
             try:
-                if os.path.exists(p):
+                if os.stat(p).st_mtime < cutoff:
                     os.remove(p)
             except Exception:
                 pass
@@ -424,8 +897,11 @@ class IOSIntegrationEngine:
         """Send result to iOS app"""
         try:
             result["timestamp"] = time.time()
-            with open(self.result_file, 'w') as f:
-                json.dump(result, f, indent=2)
+            if self._current_request_id is not None:
+                result["request_id"] = self._current_request_id
+            _write_atomic(self.result_file, _dumps(result), self.durable_writes)
+            
+            self._append_event({"event": "result", **result})
         except Exception as e:
             logger.error(f"Send result error: {e}")
     
@@ -440,12 +916,12 @@ class IOSIntegrationEngine:
     def get_latest_transcription(self) -> str:
         """Get latest transcription text for iOS app"""
         try:
-            if os.path.exists(self.stream_file):
-                with open(self.stream_file, 'r') as f:
-                    lines = f.readlines()
-                    if lines:
-                        latest = json.loads(lines[-1].strip())
-                        return latest.get('text', '')
+            record = _read_last_record(self.stream_file)
+            if record:
+                latest = _loads(record)
+                return latest.get('text', '')
+            return ""
+        except FileNotFoundError:
             return ""
         except Exception:
             return ""
@@ -454,11 +930,11 @@ class IOSIntegrationEngine:
         """Get list of detected speakers for iOS app"""
         try:
             if self.current_session:
-                output_file = self.current_session['output_file']
-                if os.path.exists(output_file):
-                    with open(output_file, 'r') as f:
-                        data = json.load(f)
-                        return data.get('speakers', [])
+                with open(self.current_session['output_file'], 'rb') as f:
+                    data = _loads(f.read())
+                return data.get('speakers', [])
+            return []
+        except FileNotFoundError:
             return []
         except Exception:
             return []
@@ -467,15 +943,7 @@ class IOSIntegrationEngine:
         """Get current engine status"""
         try:
             status = self.engine.get_status()
-            status.update({
-                "ios_integration": {
-                    "temp_dir": self.temp_dir,
-                    "status_file": self.status_file,
-                    "command_file": self.command_file,
-                    "result_file": self.result_file,
-                    "stream_file": self.stream_file
-                }
-            })
+            status["ios_integration"] = dict(self._ios_integration_info)
             
             return status
             
@@ -483,32 +951,41 @@ class IOSIntegrationEngine:
             logger.error(f"Status error: {e}")
             return {
                 "error": f"Status failed: {e}",
-                "ios_integration": {
-                    "temp_dir": self.temp_dir,
-                    "status_file": self.status_file,
-                    "command_file": self.command_file,
-                    "result_file": self.result_file,
-                    "stream_file": self.stream_file
-                }
+                "ios_integration": dict(self._ios_integration_info)
             }
     
     def cleanup(self):
         """Clean up resources"""
         try:
             self.should_monitor = False
+            with self._status_lock:
+                if self._status_timer is not None:
+                    self._status_timer.cancel()
+                    self._status_timer = None
+                self._status_dirty = False
+            if self._command_watcher is not None:
+                self._command_watcher.stop()
+                self._command_watcher = None
             
             if self.is_listening:
                 self.engine.stop_listening()
+                self.is_listening = False
+            self._stop_stream_watcher()
+            if self._event_ring is not None:
+                self._event_ring.close()
+                self._event_ring = None
             
             if self.engine:
                 self.engine.cleanup()
             
             # Clean up temp files
-            for file_path in [self.status_file, self.command_file, self.result_file, self.stream_file]:
-                if os.path.exists(file_path):
+            for file_path in [self.status_file, self.command_file, self.result_file, self.stream_file, self.events_file]:
+                try:
                     os.remove(file_path)
+                except FileNotFoundError:
+                    pass
             
-            # Purge working artifacts as well
+            # Purge working artifacts as well (waits for a startup purge still running)
             self._purge_old_artifacts(remove_all=True)
             
             logger.info("🧹 iOS Integration Engine cleaned up")
@@ -567,6 +1044,7 @@ def example_ios_usage():
         # 4. Read results from result.json file
         # 5. Read real-time updates from stream.jsonl file
         # 6. Read status from status.json file
+        #    (or tail status.jsonl for status and result events)
         
         # 7. Cleanup when done
         engine.cleanup()
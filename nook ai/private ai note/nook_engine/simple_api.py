@@ -48,7 +48,7 @@ class SimpleNookEngine:
             language: Language for transcription
             optimize_for_mobile: Enable mobile optimizations
             continuous_mode: Enable continuous transcription mode
-            interruption_gap: Gap threshold for interruption detection (seconds)
+            interruption_gap: Pause in seconds that ends a speaker's run in continuous mode
         """
         self.model_size = model_size
         self.device = "cpu" if optimize_for_mobile else device
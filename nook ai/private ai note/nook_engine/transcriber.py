@@ -7,9 +7,13 @@ import os
 import json
 import subprocess
 import platform
+import tempfile
+import threading
+import wave
 from pathlib import Path
 from typing import Dict, List, Optional, Union
 import logging
+import numpy as np
 
 # Logging setup
 logging.basicConfig(level=logging.INFO)
@@ -53,6 +57,7 @@ class WhisperTranscriber:
         self.is_initialized = False
         self.model_path = None
         self.backend_instance = None
+        self._scratch = threading.local()  # per-thread float32 buffer for transcribe_array
         
         # Model paths
         self.models_dir = self._get_models_directory()
@@ -192,15 +197,33 @@ class WhisperTranscriber:
             logger.error(f"whisper.cpp initialization error: {e}")
             return False
     
+    def _resolve_device(self) -> str:
+        """Map the device setting to a CTranslate2 device; auto picks CUDA when a GPU is visible"""
+        if self.device in ("gpu", "cuda"):
+            return "cuda"
+        if self.device == "auto":
+            try:
+                import ctranslate2
+                if ctranslate2.get_cuda_device_count() > 0:
+                    return "cuda"
+            except Exception:
+                pass
+        return "cpu"
+    
+    def _resolve_compute_type(self, device: str) -> str:
+        """Quantized weights unless a compute type was requested: int8 on CPU, int8_float16 on CUDA"""
+        if self.compute_type != "auto":
+            return self.compute_type
+        return "int8_float16" if device == "cuda" else "int8"
+    
     def _init_faster_whisper(self) -> bool:
         """Initialize faster-whisper"""
         try:
             import faster_whisper
             
             # Determine device
-            device = "cuda" if self.device == "gpu" else "cpu"
-            # Force int8 for lowest latency on CPU
-            compute_type = "int8"
+            device = self._resolve_device()
+            compute_type = self._resolve_compute_type(device)
             
             # Load model
             self.backend_instance = faster_whisper.WhisperModel(
@@ -223,8 +246,8 @@ class WhisperTranscriber:
             import whisper_ctranslate2
             
             # Determine device
-            device = "cuda" if self.device == "gpu" else "cpu"
-            compute_type = self.compute_type if self.compute_type != "auto" else "float32"
+            device = self._resolve_device()
+            compute_type = self._resolve_compute_type(device)
             
             # Load model
             self.backend_instance = whisper_ctranslate2.WhisperModel(
@@ -285,6 +308,80 @@ class WhisperTranscriber:
             logger.error(f"Transcription error: {e}")
             return None
     
+    def transcribe_array(
+        self,
+        pcm_int16: np.ndarray,
+        sample_rate: int = 16000,
+        output_format: str = "json"
+    ) -> Optional[Dict]:
+        """
+        Transcribe in-memory 16-bit mono PCM without a WAV file round-trip
+        
+        Args:
+            pcm_int16: Mono int16 samples, or float32 samples already scaled to [-1, 1]
+            sample_rate: Sampling rate of pcm_int16
+            output_format: Output format (json, txt, srt)
+            
+        Returns:
+            Dictionary with transcription result
+        """
+        if not self.is_initialized:
+            if not self.initialize():
+                return None
+        
+        # whisper.cpp only reads files, and the Python backends expect 16 kHz arrays
+        if self.backend == "whisper_cpp" or sample_rate != 16000:
+            return self._transcribe_pcm_via_file(pcm_int16, sample_rate, output_format)
+        
+        try:
+            if pcm_int16.dtype == np.float32:
+                audio = pcm_int16
+            else:
+                # Reuse a float32 buffer sized for the longest segment seen so far
+                n = len(pcm_int16)
+                scratch = getattr(self._scratch, "buffer", None)
+                if scratch is None or scratch.shape[0] < n:
+                    scratch = np.empty(n, dtype=np.float32)
+                    self._scratch.buffer = scratch
+                audio = scratch[:n]
+                np.multiply(pcm_int16, np.float32(1.0 / 32768.0), out=audio)
+            
+            if self.backend == "faster_whisper":
+                return self._transcribe_faster_whisper(audio, output_format)
+            elif self.backend == "whisper_ctranslate2":
+                return self._transcribe_ctranslate2(audio, output_format)
+            else:
+                logger.error(f"Unknown backend: {self.backend}")
+                return None
+                
+        except Exception as e:
+            logger.error(f"Transcription error: {e}")
+            return None
+    
+    def _transcribe_pcm_via_file(
+        self,
+        pcm_int16: np.ndarray,
+        sample_rate: int,
+        output_format: str
+    ) -> Optional[Dict]:
+        """Fallback for backends that need a file: write PCM to a temporary WAV"""
+        fd, tmp_path = tempfile.mkstemp(suffix=".wav")
+        os.close(fd)
+        try:
+            with wave.open(tmp_path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(sample_rate)
+                if pcm_int16.dtype == np.float32:
+                    pcm_int16 = (np.clip(pcm_int16, -1.0, 1.0) * 32767.0).astype(np.int16)
+                wf.writeframes(np.ascontiguousarray(pcm_int16, dtype=np.int16).tobytes())
+            return self.transcribe(tmp_path, output_format)
+        finally:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+    
     def _transcribe_whisper_cpp(
         self,
         audio_file: Union[str, Path],
@@ -348,7 +445,7 @@ class WhisperTranscriber:
     
     def _transcribe_faster_whisper(
         self,
-        audio_file: Union[str, Path],
+        audio_file: Union[str, Path, np.ndarray],
         output_format: str
     ) -> Optional[Dict]:
         """Transcription via faster-whisper"""
@@ -362,7 +459,7 @@ class WhisperTranscriber:
             }
             lang = self.language or "en"
             segments, info = self.backend_instance.transcribe(
-                str(audio_file),
+                audio_file if isinstance(audio_file, np.ndarray) else str(audio_file),
                 language=lang,
                 condition_on_previous_text=False,
                 **kwargs,
@@ -393,14 +490,14 @@ class WhisperTranscriber:
     
     def _transcribe_ctranslate2(
         self,
-        audio_file: Union[str, Path],
+        audio_file: Union[str, Path, np.ndarray],
         output_format: str
     ) -> Optional[Dict]:
         """Transcription via whisper-ctranslate2"""
         try:
             # Transcribe
             segments, info = self.backend_instance.transcribe(
-                str(audio_file),
+                audio_file if isinstance(audio_file, np.ndarray) else str(audio_file),
                 language=self.language
             )
             